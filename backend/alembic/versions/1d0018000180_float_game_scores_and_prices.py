@@ -0,0 +1,79 @@
+"""float_game_scores_and_prices
+
+Revision ID: 1d0018000180
+Revises: 4b08daeb751a
+Create Date: 2026-10-15 22:04:17.520391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '1d0018000180'
+down_revision: Union[str, None] = '4b08daeb751a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Previous numeric type of each column, per table
+COLUMNS = {
+    'game_sessions': {
+        'pred_above_15pct': 'numeric(4, 3)',
+        'pred_above_10pct': 'numeric(4, 3)',
+        'pred_above_5pct': 'numeric(4, 3)',
+        'pred_above_0pct': 'numeric(4, 3)',
+        'brier_score': 'numeric(6, 4)',
+        'portfolio_return': 'numeric(8, 4)',
+        'portfolio_sharpe': 'numeric(6, 4)',
+        'vs_benchmark_return': 'numeric(8, 4)',
+        'vs_benchmark_sharpe': 'numeric(6, 4)',
+    },
+    'scenarios': {
+        'fwd_return_stocks': 'numeric(8, 4)',
+        'fwd_return_bonds': 'numeric(8, 4)',
+        'fwd_return_cash': 'numeric(8, 4)',
+        'fwd_return_gold': 'numeric(8, 4)',
+    },
+    'scenario_data': {
+        'idx_stocks': 'numeric(10, 4)',
+        'idx_bonds': 'numeric(10, 4)',
+        'idx_cash': 'numeric(10, 4)',
+        'idx_gold': 'numeric(10, 4)',
+    },
+}
+
+
+def _alter_types(to_float: bool) -> None:
+    # One ALTER TABLE per table so each is rewritten only once
+    for table, columns in COLUMNS.items():
+        clauses = []
+        for column, numeric_type in columns.items():
+            new_type = 'double precision' if to_float else numeric_type
+            clauses.append(f'ALTER COLUMN {column} TYPE {new_type} USING {column}::{new_type}')
+        op.execute(f"ALTER TABLE {table} " + ", ".join(clauses))
+
+
+# The user stats trigger fires on UPDATE OF some of these columns, and
+# Postgres won't change the type of a column a trigger depends on
+DROP_TRIGGER = "DROP TRIGGER trg_game_sessions_user_stats ON game_sessions"
+CREATE_TRIGGER = """
+    CREATE TRIGGER trg_game_sessions_user_stats
+    AFTER INSERT OR DELETE
+        OR UPDATE OF user_id, brier_score, portfolio_return, vs_benchmark_return
+    ON game_sessions
+    FOR EACH ROW EXECUTE FUNCTION update_user_stats()
+"""
+
+
+def upgrade() -> None:
+    op.execute(DROP_TRIGGER)
+    _alter_types(to_float=True)
+    op.execute(CREATE_TRIGGER)
+
+
+def downgrade() -> None:
+    op.execute(DROP_TRIGGER)
+    _alter_types(to_float=False)
+    op.execute(CREATE_TRIGGER)
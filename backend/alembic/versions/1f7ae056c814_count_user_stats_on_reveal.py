@@ -0,0 +1,134 @@
+"""count_user_stats_on_reveal
+
+Revision ID: 1f7ae056c814
+Revises: 611a37fc7001
+Create Date: 2026-10-16 09:12:40.583127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '1f7ae056c814'
+down_revision: Union[str, None] = '611a37fc7001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Games are scored when they are created, so brier_score alone no longer
+# means the game has been played out. Upgrade counts a game only once it
+# is revealed (completed_at set), matching the leaderboard; downgrade
+# restores counting every scored game. {old}/{new} are the conditions for
+# the OLD/NEW row to count towards its user's stats.
+UPDATE_USER_STATS = """
+CREATE OR REPLACE FUNCTION update_user_stats() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        IF {old} THEN
+            UPDATE users SET
+                avg_brier_score = CASE WHEN games_played > 1 THEN
+                    (avg_brier_score * games_played - OLD.brier_score)
+                    / (games_played - 1) END,
+                avg_portfolio_return = CASE WHEN games_played > 1 THEN
+                    (avg_portfolio_return * games_played - COALESCE(OLD.portfolio_return, 0))
+                    / (games_played - 1) END,
+                wins_vs_benchmark = wins_vs_benchmark
+                    - ((OLD.vs_benchmark_return > 0) IS TRUE)::int,
+                losses_vs_benchmark = losses_vs_benchmark
+                    - ((OLD.vs_benchmark_return <= 0) IS TRUE)::int,
+                games_played = games_played - 1
+            WHERE id = OLD.user_id;
+        END IF;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        IF {new} THEN
+            UPDATE users SET
+                avg_brier_score =
+                    (COALESCE(avg_brier_score, 0) * COALESCE(games_played, 0) + NEW.brier_score)
+                    / (COALESCE(games_played, 0) + 1),
+                avg_portfolio_return =
+                    (COALESCE(avg_portfolio_return, 0) * COALESCE(games_played, 0)
+                     + COALESCE(NEW.portfolio_return, 0))
+                    / (COALESCE(games_played, 0) + 1),
+                wins_vs_benchmark = COALESCE(wins_vs_benchmark, 0)
+                    + ((NEW.vs_benchmark_return > 0) IS TRUE)::int,
+                losses_vs_benchmark = COALESCE(losses_vs_benchmark, 0)
+                    + ((NEW.vs_benchmark_return <= 0) IS TRUE)::int,
+                games_played = COALESCE(games_played, 0) + 1
+            WHERE id = NEW.user_id;
+        END IF;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+COUNTED = "{row}.user_id IS NOT NULL AND {row}.brier_score IS NOT NULL"
+REVEALED = " AND {row}.completed_at IS NOT NULL"
+
+DROP_TRIGGER = "DROP TRIGGER trg_game_sessions_user_stats ON game_sessions"
+CREATE_TRIGGER = """
+    CREATE TRIGGER trg_game_sessions_user_stats
+    AFTER INSERT OR DELETE
+        OR UPDATE OF {columns}
+    ON game_sessions
+    FOR EACH ROW EXECUTE FUNCTION update_user_stats()
+"""
+TRIGGER_COLUMNS = "user_id, brier_score, portfolio_return, vs_benchmark_return"
+
+# Recompute the aggregates from scratch over the games that count
+RESET_STATS = """
+    UPDATE users SET
+        games_played = 0,
+        avg_brier_score = NULL,
+        avg_portfolio_return = NULL,
+        wins_vs_benchmark = 0,
+        losses_vs_benchmark = 0
+"""
+BACKFILL_STATS = """
+    UPDATE users SET
+        games_played = s.games,
+        avg_brier_score = s.avg_brier,
+        avg_portfolio_return = s.avg_return,
+        wins_vs_benchmark = s.wins,
+        losses_vs_benchmark = s.losses
+    FROM (
+        SELECT user_id,
+               COUNT(*) AS games,
+               AVG(brier_score) AS avg_brier,
+               AVG(COALESCE(portfolio_return, 0)) AS avg_return,
+               COUNT(*) FILTER (WHERE vs_benchmark_return > 0) AS wins,
+               COUNT(*) FILTER (WHERE vs_benchmark_return <= 0) AS losses
+        FROM game_sessions
+        WHERE {counted}
+        GROUP BY user_id
+    ) s
+    WHERE users.id = s.user_id
+"""
+
+
+def _install(revealed_only: bool) -> None:
+    condition = COUNTED + (REVEALED if revealed_only else "")
+    columns = TRIGGER_COLUMNS + (", completed_at" if revealed_only else "")
+
+    op.execute(UPDATE_USER_STATS.format(
+        old=condition.format(row="OLD"), new=condition.format(row="NEW"),
+    ))
+    # Recreating the trigger locks out writes to game_sessions until this
+    # migration commits, so the backfill can't miss or double count a game
+    op.execute(DROP_TRIGGER)
+    op.execute(CREATE_TRIGGER.format(columns=columns))
+    op.execute(RESET_STATS)
+    op.execute(BACKFILL_STATS.format(counted=condition.format(row="game_sessions")))
+
+
+def upgrade() -> None:
+    _install(revealed_only=True)
+
+
+def downgrade() -> None:
+    _install(revealed_only=False)
@@ -0,0 +1,54 @@
+"""float_scenario_stats_and_macro
+
+Revision ID: 25c707047131
+Revises: bea453fb7002
+Create Date: 2026-10-15 22:58:06.841127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '25c707047131'
+down_revision: Union[str, None] = 'bea453fb7002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Previous numeric type of each column, per table
+COLUMNS = {
+    'scenarios': {
+        'fwd_volatility_stocks': 'numeric(8, 4)',
+        'fwd_volatility_bonds': 'numeric(8, 4)',
+        'fwd_volatility_gold': 'numeric(8, 4)',
+        'benchmark_6040_return': 'numeric(8, 4)',
+        'benchmark_6040_sharpe': 'numeric(8, 4)',
+    },
+    'scenario_data': {
+        'gdp_growth_yoy': 'numeric(6, 2)',
+        'unemployment_rate': 'numeric(5, 2)',
+        'inflation_rate_yoy': 'numeric(6, 2)',
+        'fed_funds_rate': 'numeric(5, 2)',
+        'industrial_prod_yoy': 'numeric(6, 2)',
+    },
+}
+
+
+def _alter_types(to_float: bool) -> None:
+    # One ALTER TABLE per table so each is rewritten only once
+    for table, columns in COLUMNS.items():
+        clauses = []
+        for column, numeric_type in columns.items():
+            new_type = 'double precision' if to_float else numeric_type
+            clauses.append(f'ALTER COLUMN {column} TYPE {new_type} USING {column}::{new_type}')
+        op.execute(f"ALTER TABLE {table} " + ", ".join(clauses))
+
+
+def upgrade() -> None:
+    _alter_types(to_float=True)
+
+
+def downgrade() -> None:
+    _alter_types(to_float=False)
@@ -0,0 +1,49 @@
+"""drop_redundant_id_indexes
+
+Revision ID: 38d35e1b4d2f
+Revises: aaab592ae201
+Create Date: 2026-10-15 13:05:37.284190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '38d35e1b4d2f'
+down_revision: Union[str, None] = 'aaab592ae201'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Plain indexes on primary key columns; the pkey index already covers them
+ID_INDEXES = {
+    'ix_scenarios_id': 'scenarios',
+    'ix_scenario_data_id': 'scenario_data',
+    'ix_game_sessions_id': 'game_sessions',
+    'ix_users_id': 'users',
+    'ix_magic_link_attempts_id': 'magic_link_attempts',
+}
+
+
+def upgrade() -> None:
+    # CONCURRENTLY can't run inside a transaction block
+    with op.get_context().autocommit_block():
+        for index_name, table_name in ID_INDEXES.items():
+            op.drop_index(
+                index_name,
+                table_name=table_name,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index_name, table_name in ID_INDEXES.items():
+            op.create_index(
+                index_name,
+                table_name,
+                ['id'],
+                unique=False,
+                postgresql_concurrently=True,
+            )
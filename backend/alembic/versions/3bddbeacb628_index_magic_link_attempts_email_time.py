@@ -0,0 +1,51 @@
+"""index_magic_link_attempts_email_time
+
+Revision ID: 3bddbeacb628
+Revises: 7bd1434dbb65
+Create Date: 2026-10-15 09:40:02.518843
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '3bddbeacb628'
+down_revision: Union[str, None] = '7bd1434dbb65'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY can't run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_mla_email_attempted',
+            'magic_link_attempts',
+            ['email', sa.text('attempted_at DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        # Redundant: email is the leading column of the composite index
+        op.drop_index(
+            'ix_magic_link_attempts_email',
+            table_name='magic_link_attempts',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_magic_link_attempts_email',
+            'magic_link_attempts',
+            ['email'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_mla_email_attempted',
+            table_name='magic_link_attempts',
+            postgresql_concurrently=True,
+        )
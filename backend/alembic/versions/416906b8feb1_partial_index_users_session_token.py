@@ -0,0 +1,53 @@
+"""partial_index_users_session_token
+
+Revision ID: 416906b8feb1
+Revises: 3bddbeacb628
+Create Date: 2026-10-15 10:05:37.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '416906b8feb1'
+down_revision: Union[str, None] = '3bddbeacb628'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        # now() isn't allowed in an index predicate; NOT NULL already skips
+        # every logged-out user
+        op.create_index(
+            'ix_users_active_session',
+            'users',
+            ['session_token'],
+            unique=True,
+            postgresql_where=sa.text('session_token IS NOT NULL'),
+            postgresql_include=['id', 'username', 'email', 'session_expires'],
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_users_session_token',
+            table_name='users',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_session_token',
+            'users',
+            ['session_token'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_users_active_session',
+            table_name='users',
+            postgresql_concurrently=True,
+        )
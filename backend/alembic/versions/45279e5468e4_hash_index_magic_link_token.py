@@ -0,0 +1,52 @@
+"""hash_index_magic_link_token
+
+Revision ID: 45279e5468e4
+Revises: 25c707047131
+Create Date: 2026-10-15 23:14:40.263517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '45279e5468e4'
+down_revision: Union[str, None] = '25c707047131'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_magic_link_hash',
+            'users',
+            ['magic_link_token_hash'],
+            unique=False,
+            postgresql_using='hash',
+            postgresql_where=sa.text('magic_link_token_hash IS NOT NULL'),
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_users_magic_link_token_hash',
+            table_name='users',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_magic_link_token_hash',
+            'users',
+            ['magic_link_token_hash'],
+            unique=False,
+            postgresql_where=sa.text('magic_link_token_hash IS NOT NULL'),
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_users_magic_link_hash',
+            table_name='users',
+            postgresql_concurrently=True,
+        )
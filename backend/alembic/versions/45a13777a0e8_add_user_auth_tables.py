@@ -55,7 +55,12 @@ def upgrade() -> None:
     # Add user_id to game_sessions
     op.add_column('game_sessions', sa.Column('user_id', sa.Integer(), nullable=True))
     op.create_index(op.f('ix_game_sessions_user_id'), 'game_sessions', ['user_id'], unique=False)
-    op.create_foreign_key('fk_game_sessions_user_id', 'game_sessions', 'users', ['user_id'], ['id'])
+    # NOT VALID skips the full-table scan under ACCESS EXCLUSIVE; existing rows
+    # are checked by a later VALIDATE CONSTRAINT migration
+    op.execute(
+        "ALTER TABLE game_sessions ADD CONSTRAINT fk_game_sessions_user_id "
+        "FOREIGN KEY (user_id) REFERENCES users(id) NOT VALID"
+    )
 
 
 def downgrade() -> None:
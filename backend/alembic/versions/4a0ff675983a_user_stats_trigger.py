@@ -0,0 +1,121 @@
+"""user_stats_trigger
+
+Revision ID: 4a0ff675983a
+Revises: 8168f63cd2d1
+Create Date: 2026-10-15 14:08:52.317644
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '4a0ff675983a'
+down_revision: Union[str, None] = '8168f63cd2d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# A game counts towards its user's stats once it has been scored. Updates
+# back out the old row's contribution and add the new one, so re-scoring,
+# linking a game to a user or moving it between users stays consistent.
+UPDATE_USER_STATS = """
+CREATE OR REPLACE FUNCTION update_user_stats() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        IF OLD.user_id IS NOT NULL AND OLD.brier_score IS NOT NULL THEN
+            UPDATE users SET
+                avg_brier_score = CASE WHEN games_played > 1 THEN
+                    (avg_brier_score * games_played - OLD.brier_score)
+                    / (games_played - 1) END,
+                avg_portfolio_return = CASE WHEN games_played > 1 THEN
+                    (avg_portfolio_return * games_played - COALESCE(OLD.portfolio_return, 0))
+                    / (games_played - 1) END,
+                wins_vs_benchmark = wins_vs_benchmark
+                    - ((OLD.vs_benchmark_return > 0) IS TRUE)::int,
+                losses_vs_benchmark = losses_vs_benchmark
+                    - ((OLD.vs_benchmark_return <= 0) IS TRUE)::int,
+                games_played = games_played - 1
+            WHERE id = OLD.user_id;
+        END IF;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        IF NEW.user_id IS NOT NULL AND NEW.brier_score IS NOT NULL THEN
+            UPDATE users SET
+                avg_brier_score =
+                    (COALESCE(avg_brier_score, 0) * COALESCE(games_played, 0) + NEW.brier_score)
+                    / (COALESCE(games_played, 0) + 1),
+                avg_portfolio_return =
+                    (COALESCE(avg_portfolio_return, 0) * COALESCE(games_played, 0)
+                     + COALESCE(NEW.portfolio_return, 0))
+                    / (COALESCE(games_played, 0) + 1),
+                wins_vs_benchmark = COALESCE(wins_vs_benchmark, 0)
+                    + ((NEW.vs_benchmark_return > 0) IS TRUE)::int,
+                losses_vs_benchmark = COALESCE(losses_vs_benchmark, 0)
+                    + ((NEW.vs_benchmark_return <= 0) IS TRUE)::int,
+                games_played = COALESCE(games_played, 0) + 1
+            WHERE id = NEW.user_id;
+        END IF;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    op.execute(UPDATE_USER_STATS)
+    
+    # CREATE TRIGGER locks out writes to game_sessions until this migration
+    # commits, so the backfill below can't miss or double count a game
+    op.execute(
+        """
+        CREATE TRIGGER trg_game_sessions_user_stats
+        AFTER INSERT OR DELETE
+            OR UPDATE OF user_id, brier_score, portfolio_return, vs_benchmark_return
+        ON game_sessions
+        FOR EACH ROW EXECUTE FUNCTION update_user_stats()
+        """
+    )
+    
+    # Recompute the aggregates from scratch; nothing maintained them before
+    op.execute(
+        """
+        UPDATE users SET
+            games_played = 0,
+            avg_brier_score = NULL,
+            avg_portfolio_return = NULL,
+            wins_vs_benchmark = 0,
+            losses_vs_benchmark = 0
+        """
+    )
+    op.execute(
+        """
+        UPDATE users SET
+            games_played = s.games,
+            avg_brier_score = s.avg_brier,
+            avg_portfolio_return = s.avg_return,
+            wins_vs_benchmark = s.wins,
+            losses_vs_benchmark = s.losses
+        FROM (
+            SELECT user_id,
+                   COUNT(*) AS games,
+                   AVG(brier_score) AS avg_brier,
+                   AVG(COALESCE(portfolio_return, 0)) AS avg_return,
+                   COUNT(*) FILTER (WHERE vs_benchmark_return > 0) AS wins,
+                   COUNT(*) FILTER (WHERE vs_benchmark_return <= 0) AS losses
+            FROM game_sessions
+            WHERE user_id IS NOT NULL AND brier_score IS NOT NULL
+            GROUP BY user_id
+        ) s
+        WHERE users.id = s.user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_game_sessions_user_stats ON game_sessions")
+    op.execute("DROP FUNCTION IF EXISTS update_user_stats()")
@@ -0,0 +1,55 @@
+"""add_scenario_monthly_returns
+
+Revision ID: 4b08daeb751a
+Revises: bd2cd467f225
+Create Date: 2026-10-15 16:04:31.772915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '4b08daeb751a'
+down_revision: Union[str, None] = 'bd2cd467f225'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('scenarios', sa.Column('monthly_returns', postgresql.JSONB(), nullable=True))
+    
+    # Backfill from scenario_data: month-over-month returns for the forward
+    # period (months 25-36, each relative to the month before)
+    op.execute(
+        """
+        UPDATE scenarios SET monthly_returns = r.monthly_returns
+        FROM (
+            SELECT scenario_id,
+                   jsonb_build_object(
+                       'stocks', jsonb_agg(((idx_stocks - prev_stocks) / prev_stocks)::float8 ORDER BY month_index),
+                       'bonds', jsonb_agg(((idx_bonds - prev_bonds) / prev_bonds)::float8 ORDER BY month_index),
+                       'cash', jsonb_agg(((idx_cash - prev_cash) / prev_cash)::float8 ORDER BY month_index),
+                       'gold', jsonb_agg(((idx_gold - prev_gold) / prev_gold)::float8 ORDER BY month_index)
+                   ) AS monthly_returns
+            FROM (
+                SELECT scenario_id, month_index,
+                       idx_stocks, lag(idx_stocks) OVER w AS prev_stocks,
+                       idx_bonds, lag(idx_bonds) OVER w AS prev_bonds,
+                       idx_cash, lag(idx_cash) OVER w AS prev_cash,
+                       idx_gold, lag(idx_gold) OVER w AS prev_gold
+                FROM scenario_data
+                WINDOW w AS (PARTITION BY scenario_id ORDER BY month_index)
+            ) d
+            WHERE month_index > 24
+            GROUP BY scenario_id
+        ) r
+        WHERE scenarios.id = r.scenario_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('scenarios', 'monthly_returns')
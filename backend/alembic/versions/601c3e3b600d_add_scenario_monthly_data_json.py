@@ -0,0 +1,55 @@
+"""add_scenario_monthly_data_json
+
+Revision ID: 601c3e3b600d
+Revises: 45279e5468e4
+Create Date: 2026-10-15 23:31:12.904738
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '601c3e3b600d'
+down_revision: Union[str, None] = '45279e5468e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('scenarios', sa.Column('monthly_data_json', postgresql.JSONB(), nullable=True))
+    
+    # Backfill from scenario_data, one object per month in month order
+    op.execute(
+        """
+        UPDATE scenarios SET monthly_data_json = d.months
+        FROM (
+            SELECT scenario_id,
+                   jsonb_agg(
+                       jsonb_build_object(
+                           'month_index', month_index,
+                           'is_forward', is_forward,
+                           'idx_stocks', idx_stocks,
+                           'idx_bonds', idx_bonds,
+                           'idx_cash', idx_cash,
+                           'idx_gold', idx_gold,
+                           'gdp_growth_yoy', gdp_growth_yoy,
+                           'unemployment_rate', unemployment_rate,
+                           'inflation_rate_yoy', inflation_rate_yoy,
+                           'fed_funds_rate', fed_funds_rate,
+                           'industrial_prod_yoy', industrial_prod_yoy
+                       )
+                       ORDER BY month_index
+                   ) AS months
+            FROM scenario_data
+            GROUP BY scenario_id
+        ) d
+        WHERE scenarios.id = d.scenario_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('scenarios', 'monthly_data_json')
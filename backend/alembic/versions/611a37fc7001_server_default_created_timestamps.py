@@ -0,0 +1,51 @@
+"""server_default_created_timestamps
+
+Revision ID: 611a37fc7001
+Revises: 601c3e3b600d
+Create Date: 2026-10-15 23:47:25.318960
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '611a37fc7001'
+down_revision: Union[str, None] = '601c3e3b600d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (table, column) set on insert by the database clock
+COLUMNS = [
+    ('users', 'created_at'),
+    ('magic_link_attempts', 'attempted_at'),
+]
+
+
+def upgrade() -> None:
+    # Existing values were written with datetime.utcnow()
+    for table, column in COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=sa.DateTime(timezone=True),
+            existing_type=sa.DateTime(),
+            existing_nullable=True,
+            server_default=sa.text('now()'),
+            postgresql_using=f"{column} AT TIME ZONE 'UTC'",
+        )
+
+
+def downgrade() -> None:
+    for table, column in COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=sa.DateTime(),
+            existing_type=sa.DateTime(timezone=True),
+            existing_nullable=True,
+            server_default=None,
+            postgresql_using=f"{column} AT TIME ZONE 'UTC'",
+        )
@@ -0,0 +1,25 @@
+"""validate_alloc_sum_check
+
+Revision ID: 793dd032811e
+Revises: c5f2ad546d43
+Create Date: 2026-10-15 11:09:30.418775
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '793dd032811e'
+down_revision: Union[str, None] = 'c5f2ad546d43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE game_sessions VALIDATE CONSTRAINT chk_alloc_sum")
+
+
+def downgrade() -> None:
+    pass
@@ -0,0 +1,31 @@
+"""add_magic_link_counters
+
+Revision ID: 7bd1434dbb65
+Revises: 45a13777a0e8
+Create Date: 2026-10-15 09:12:44.105318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '7bd1434dbb65'
+down_revision: Union[str, None] = '45a13777a0e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # One row per email, bumped atomically by the magic link rate limiter
+    op.create_table('magic_link_counters',
+        sa.Column('email', sa.String(length=255), nullable=False),
+        sa.Column('window_start', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('email')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('magic_link_counters')
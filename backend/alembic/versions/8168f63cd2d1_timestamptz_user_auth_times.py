@@ -0,0 +1,37 @@
+"""timestamptz_user_auth_times
+
+Revision ID: 8168f63cd2d1
+Revises: 38d35e1b4d2f
+Create Date: 2026-10-15 13:41:18.902517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '8168f63cd2d1'
+down_revision: Union[str, None] = '38d35e1b4d2f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Compared against (or set from) the database clock via now()
+COLUMNS = ['magic_link_expires', 'session_expires', 'last_login']
+
+
+def _alter_types(new_type: str) -> None:
+    # One ALTER TABLE so users is rewritten (and its indexes rebuilt) once
+    op.execute("ALTER TABLE users " + ", ".join(
+        f"ALTER COLUMN {column} TYPE {new_type} USING {column} AT TIME ZONE 'UTC'"
+        for column in COLUMNS
+    ))
+
+
+def upgrade() -> None:
+    # Existing values were written with datetime.utcnow()
+    _alter_types('timestamptz')
+
+
+def downgrade() -> None:
+    _alter_types('timestamp')
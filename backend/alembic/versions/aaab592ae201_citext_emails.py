@@ -0,0 +1,48 @@
+"""citext_emails
+
+Revision ID: aaab592ae201
+Revises: c6a7913defc4
+Create Date: 2026-10-15 12:02:47.731196
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'aaab592ae201'
+down_revision: Union[str, None] = 'c6a7913defc4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EMAIL_TABLES = ['users', 'magic_link_attempts', 'magic_link_counters']
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS citext")
+    
+    # varchar -> citext is binary-coercible, so Postgres only rebuilds the
+    # indexes on these columns (no table rewrite). Emails were always
+    # lowercased on write, so the unique index can't gain conflicts.
+    for table in EMAIL_TABLES:
+        op.alter_column(
+            table,
+            'email',
+            type_=postgresql.CITEXT(),
+            existing_type=sa.String(length=255),
+            existing_nullable=False,
+        )
+
+
+def downgrade() -> None:
+    for table in EMAIL_TABLES:
+        op.alter_column(
+            table,
+            'email',
+            type_=sa.String(length=255),
+            existing_type=postgresql.CITEXT(),
+            existing_nullable=False,
+            postgresql_using='lower(email::text)',
+        )
@@ -0,0 +1,28 @@
+"""validate_game_sessions_user_fk
+
+Revision ID: b0ac04f55a2d
+Revises: dbb48abd5ae1
+Create Date: 2026-10-15 10:52:09.337410
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b0ac04f55a2d'
+down_revision: Union[str, None] = 'dbb48abd5ae1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # SHARE UPDATE EXCLUSIVE only: reads and writes continue while existing
+    # rows are checked. No-op on databases where the FK is already valid.
+    op.execute("ALTER TABLE game_sessions VALIDATE CONSTRAINT fk_game_sessions_user_id")
+
+
+def downgrade() -> None:
+    # Nothing to undo: a validated constraint is the same constraint
+    pass
@@ -0,0 +1,39 @@
+"""index_game_sessions_leaderboard
+
+Revision ID: bd2cd467f225
+Revises: 4a0ff675983a
+Create Date: 2026-10-15 15:22:09.518370
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'bd2cd467f225'
+down_revision: Union[str, None] = '4a0ff675983a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY can't run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_gs_leaderboard',
+            'game_sessions',
+            ['username', sa.text('completed_at DESC')],
+            unique=False,
+            postgresql_where=sa.text('username IS NOT NULL AND completed_at IS NOT NULL'),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_gs_leaderboard',
+            table_name='game_sessions',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,54 @@
+"""cover_leaderboard_index_scores
+
+Revision ID: bea453fb7002
+Revises: 1d0018000180
+Create Date: 2026-10-15 22:41:53.106284
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'bea453fb7002'
+down_revision: Union[str, None] = '1d0018000180'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY can't run inside a transaction block. Build the covering
+    # index before dropping the one it replaces so there's no gap.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_gs_leaderboard_scores',
+            'game_sessions',
+            ['username', sa.text('completed_at DESC')],
+            unique=False,
+            postgresql_where=sa.text('username IS NOT NULL AND completed_at IS NOT NULL'),
+            postgresql_include=['brier_score', 'portfolio_sharpe', 'vs_benchmark_return'],
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_gs_leaderboard',
+            table_name='game_sessions',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_gs_leaderboard',
+            'game_sessions',
+            ['username', sa.text('completed_at DESC')],
+            unique=False,
+            postgresql_where=sa.text('username IS NOT NULL AND completed_at IS NOT NULL'),
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_gs_leaderboard_scores',
+            table_name='game_sessions',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,32 @@
+"""add_alloc_sum_check
+
+Revision ID: c5f2ad546d43
+Revises: b0ac04f55a2d
+Create Date: 2026-10-15 11:08:51.270934
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5f2ad546d43'
+down_revision: Union[str, None] = 'b0ac04f55a2d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # NOT VALID: enforced for new writes immediately, existing rows are
+    # checked by the next revision without blocking traffic
+    op.execute(
+        "ALTER TABLE game_sessions ADD CONSTRAINT chk_alloc_sum CHECK ("
+        "COALESCE(alloc_stocks, 0) + COALESCE(alloc_bonds, 0) "
+        "+ COALESCE(alloc_cash, 0) + COALESCE(alloc_gold, 0) = 100"
+        ") NOT VALID"
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('chk_alloc_sum', 'game_sessions', type_='check')
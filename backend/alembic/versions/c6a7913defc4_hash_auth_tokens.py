@@ -0,0 +1,92 @@
+"""hash_auth_tokens
+
+Revision ID: c6a7913defc4
+Revises: 793dd032811e
+Create Date: 2026-10-15 11:36:12.590442
+
+"""
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6a7913defc4'
+down_revision: Union[str, None] = '793dd032811e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _digest(token):
+    return hashlib.sha256(token.encode()).digest() if token else None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('magic_link_token_hash', sa.LargeBinary(length=32), nullable=True))
+    op.add_column('users', sa.Column('session_token_hash', sa.LargeBinary(length=32), nullable=True))
+    
+    # Backfill digests so existing sessions and pending links keep working
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT id, magic_link_token, session_token FROM users "
+        "WHERE magic_link_token IS NOT NULL OR session_token IS NOT NULL"
+    )).fetchall()
+    for row in rows:
+        bind.execute(
+            sa.text(
+                "UPDATE users SET magic_link_token_hash = :mh, session_token_hash = :sh "
+                "WHERE id = :id"
+            ),
+            {"id": row.id, "mh": _digest(row.magic_link_token), "sh": _digest(row.session_token)},
+        )
+    
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_active_session_hash',
+            'users',
+            ['session_token_hash'],
+            unique=True,
+            postgresql_where=sa.text('session_token_hash IS NOT NULL'),
+            postgresql_include=['id', 'username', 'email', 'session_expires'],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_users_magic_link_token_hash',
+            'users',
+            ['magic_link_token_hash'],
+            unique=False,
+            postgresql_where=sa.text('magic_link_token_hash IS NOT NULL'),
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_users_active_session',
+            table_name='users',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_active_session',
+            'users',
+            ['session_token'],
+            unique=True,
+            postgresql_where=sa.text('session_token IS NOT NULL'),
+            postgresql_include=['id', 'username', 'email', 'session_expires'],
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_users_magic_link_token_hash',
+            table_name='users',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_users_active_session_hash',
+            table_name='users',
+            postgresql_concurrently=True,
+        )
+    
+    op.drop_column('users', 'session_token_hash')
+    op.drop_column('users', 'magic_link_token_hash')
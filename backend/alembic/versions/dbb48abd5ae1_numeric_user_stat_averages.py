@@ -0,0 +1,69 @@
+"""numeric_user_stat_averages
+
+Revision ID: dbb48abd5ae1
+Revises: 416906b8feb1
+Create Date: 2026-10-15 10:31:18.664021
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'dbb48abd5ae1'
+down_revision: Union[str, None] = '416906b8feb1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+# (column, type, game_sessions source column)
+AVERAGE_COLUMNS = [
+    ('avg_brier_score', sa.Numeric(6, 4), 'brier_score'),
+    ('avg_portfolio_return', sa.Numeric(8, 4), 'portfolio_return'),
+]
+
+
+def upgrade() -> None:
+    # Add-backfill-swap instead of ALTER COLUMN TYPE, which would rewrite
+    # the whole table under an ACCESS EXCLUSIVE lock
+    for column, type_, _ in AVERAGE_COLUMNS:
+        op.add_column('users', sa.Column(f'{column}_new', type_, nullable=True))
+    
+    # Backfill in id-range batches, each committed on its own
+    bind = op.get_bind()
+    with op.get_context().autocommit_block():
+        max_id = bind.execute(sa.text("SELECT COALESCE(MAX(id), 0) FROM users")).scalar()
+        for start in range(0, max_id + 1, BATCH_SIZE):
+            bind.execute(
+                sa.text(
+                    """
+                    UPDATE users SET
+                        avg_brier_score_new = s.avg_brier,
+                        avg_portfolio_return_new = s.avg_return
+                    FROM (
+                        SELECT user_id,
+                               AVG(brier_score) AS avg_brier,
+                               AVG(portfolio_return) AS avg_return
+                        FROM game_sessions
+                        WHERE completed_at IS NOT NULL
+                          AND user_id >= :lo AND user_id < :hi
+                        GROUP BY user_id
+                    ) s
+                    WHERE users.id = s.user_id
+                    """
+                ),
+                {"lo": start, "hi": start + BATCH_SIZE},
+            )
+    
+    # Swap names in a short transaction
+    for column, _, _ in AVERAGE_COLUMNS:
+        op.drop_column('users', column)
+        op.alter_column('users', f'{column}_new', new_column_name=column)
+
+
+def downgrade() -> None:
+    for column, _, _ in AVERAGE_COLUMNS:
+        op.drop_column('users', column)
+        op.add_column('users', sa.Column(column, sa.Integer(), nullable=True))
@@ -1,24 +1,43 @@
 """Authentication API endpoints using magic links."""
+import hashlib
+import json
+import queue
 import secrets
-from datetime import datetime, timedelta
-from typing import Optional
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Request, Response
-from fastapi.responses import RedirectResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse, RedirectResponse
 from pydantic import BaseModel, EmailStr
-from sqlalchemy.orm import Session
-import resend
+from sqlalchemy import case, exists, func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.models import User, MagicLinkAttempt, GameSession
+from app.api.leaderboard import invalidate_leaderboard_cache
+from app.cache import cache_delete, cache_get, cache_set
+from app.database import get_db, AsyncSessionLocal
+from app.models import User, MagicLinkAttempt, MagicLinkCounter, GameSession
 from app.config import get_settings
+from app.services.email import send_magic_link_email
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 settings = get_settings()
 
-# Initialize Resend
-if settings.resend_api_key:
-    resend.api_key = settings.resend_api_key
+# Rate limiting: max 3 magic link requests per email per hour
+MAGIC_LINK_MAX_ATTEMPTS = 3
+MAGIC_LINK_WINDOW = timedelta(hours=1)
+
+# Upper bound on how long a session lookup is served from cache
+SESSION_CACHE_TTL_SECONDS = 60
+
+# Settings used on request paths, resolved once
+MAGIC_LINK_TTL = timedelta(minutes=settings.magic_link_expires_minutes)
+MAGIC_LINK_URL_PREFIX = f"{settings.frontend_url}/auth/verify?token="
+SESSION_TTL = timedelta(days=settings.session_expires_days)
+SESSION_COOKIE_MAX_AGE = int(SESSION_TTL.total_seconds())
+SECURE_COOKIES = settings.environment == "production"
+SEND_EMAILS = bool(settings.resend_api_key)
 
 
 class MagicLinkRequest(BaseModel):
@@ -42,124 +61,219 @@ class SetUsernameRequest(BaseModel):
     username: str
 
 
+def _fill_token_pool() -> None:
+    """Keep the token pool topped up; put() blocks while it is full."""
+    while True:
+        _TOKEN_POOL.put(secrets.token_urlsafe(32))
+
+
+# Tokens are generated ahead of time by a daemon thread so the request path
+# only pops from a queue. Still sourced from `secrets`.
+_TOKEN_POOL: "queue.Queue[str]" = queue.Queue(maxsize=512)
+threading.Thread(target=_fill_token_pool, name="token-pool", daemon=True).start()
+
+
 def generate_magic_token() -> str:
     """Generate a secure random token for magic links."""
-    return secrets.token_urlsafe(32)
+    try:
+        return _TOKEN_POOL.get_nowait()
+    except queue.Empty:
+        return secrets.token_urlsafe(32)
 
 
-def get_current_user(
-    request: Request,
-    db: Session = Depends(get_db)
-) -> Optional[User]:
-    """Get current user from session token cookie."""
+def hash_token(token: str) -> bytes:
+    """SHA-256 digest of a token; only digests are stored and looked up."""
+    return hashlib.sha256(token.encode()).digest()
+
+
+class SessionUser(NamedTuple):
+    """Lightweight view of the logged-in user, cached per session token."""
+    id: int
+    username: Optional[str]
+    email: str
+    session_expires: datetime
+
+
+def _session_cache_key(session_token: str) -> str:
+    return f"session:{hash_token(session_token).hex()}"
+
+
+async def _lookup_session_user(request: Request, db: AsyncSession) -> Optional[SessionUser]:
+    """Resolve the session token cookie via Redis, then the database."""
     session_token = request.cookies.get("session_token")
     if not session_token:
         return None
     
-    user = db.query(User).filter(
-        User.session_token == session_token,
-        User.session_expires > datetime.utcnow()
-    ).first()
+    cache_key = _session_cache_key(session_token)
+    cached = await cache_get(cache_key)
+    if cached is not None:
+        data = json.loads(cached)
+        return SessionUser(
+            id=data["id"],
+            username=data["username"],
+            email=data["email"],
+            session_expires=datetime.fromisoformat(data["session_expires"]),
+        )
     
-    return user
+    # Only the columns SessionUser needs, not the full User entity
+    row = (await db.execute(
+        select(User.id, User.username, User.email, User.session_expires)
+        .where(
+            User.session_token_hash == hash_token(session_token),
+            User.session_expires > func.now(),
+        )
+    )).first()
+    
+    if not row:
+        return None
+    
+    session_user = SessionUser(*row)
+    
+    # Never cache past the session's own expiry
+    ttl = min(
+        int((session_user.session_expires - datetime.now(timezone.utc)).total_seconds()),
+        SESSION_CACHE_TTL_SECONDS,
+    )
+    if ttl > 0:
+        await cache_set(cache_key, json.dumps({
+            "id": session_user.id,
+            "username": session_user.username,
+            "email": session_user.email,
+            "session_expires": session_user.session_expires.isoformat(),
+        }), ttl)
+    
+    return session_user
 
 
-def require_auth(
+async def get_current_user(
     request: Request,
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_db)
+) -> Optional[SessionUser]:
+    """Get current user from session token cookie."""
+    # Resolved at most once per request, including anonymous (None)
+    if hasattr(request.state, "current_user"):
+        return request.state.current_user
+    user = await _lookup_session_user(request, db)
+    request.state.current_user = user
+    return user
+
+
+async def require_auth(user: Optional[SessionUser] = Depends(get_current_user)) -> SessionUser:
     """Require authentication - raises 401 if not logged in."""
-    user = get_current_user(request, db)
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
     return user
 
 
+async def load_full_user(
+    session_user: SessionUser = Depends(require_auth),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """Require authentication and load the full User row (stats, etc.)."""
+    user = await db.get(User, session_user.id)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return user
+
+
+async def bump_magic_link_counter(db: AsyncSession, email: str) -> int:
+    """
+    Count a magic link request against the email's rate-limit window.
+    
+    Single upsert on the per-email counter row: starts a fresh window when the
+    previous one is older than MAGIC_LINK_WINDOW, otherwise increments it.
+    Returns the number of attempts in the current window.
+    """
+    window_open = MagicLinkCounter.window_start > func.now() - MAGIC_LINK_WINDOW
+    stmt = (
+        pg_insert(MagicLinkCounter)
+        .values(email=email, window_start=func.now(), attempts=1)
+        .on_conflict_do_update(
+            index_elements=[MagicLinkCounter.email],
+            set_={
+                "attempts": case((window_open, MagicLinkCounter.attempts + 1), else_=1),
+                "window_start": case((window_open, MagicLinkCounter.window_start), else_=func.now()),
+            },
+        )
+        .returning(MagicLinkCounter.attempts)
+    )
+    return (await db.execute(stmt)).scalar_one()
+
+
+async def record_magic_link_attempt(email: str, ip_address: Optional[str]) -> None:
+    """Append to the magic link audit log (runs as a background task)."""
+    async with AsyncSessionLocal() as db:
+        # Core insert: write-only row, no need for identity map tracking
+        await db.execute(
+            insert(MagicLinkAttempt).values(
+                email=email,
+                ip_address=ip_address,
+            )
+        )
+        await db.commit()
+
+
+async def backfill_game_usernames(user_id: int, username: str) -> None:
+    """Copy a user's new username onto their games (runs as a background task)."""
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(GameSession)
+            .where(
+                GameSession.user_id == user_id,
+                # Skip rows that already match so they aren't rewritten
+                GameSession.username.is_distinct_from(username),
+            )
+            .values(username=username)
+        )
+        await db.commit()
+    await invalidate_leaderboard_cache()
+
+
 @router.post("/magic-link", response_model=MagicLinkResponse)
-def request_magic_link(
+async def request_magic_link(
     data: MagicLinkRequest,
     request: Request,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db)
 ):
     """Request a magic link to be sent to email."""
-    email = data.email.lower()
+    email = data.email  # citext columns compare case-insensitively
     
-    # Rate limiting: max 3 attempts per email per hour
-    one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-    recent_attempts = db.query(MagicLinkAttempt).filter(
-        MagicLinkAttempt.email == email,
-        MagicLinkAttempt.attempted_at > one_hour_ago
-    ).count()
-    
-    if recent_attempts >= 3:
+    # Rate limiting (rejected requests are rolled back, so they don't count)
+    if await bump_magic_link_counter(db, email) > MAGIC_LINK_MAX_ATTEMPTS:
         raise HTTPException(
             status_code=429, 
             detail="Too many login attempts. Please try again later."
         )
     
-    # Record attempt
-    attempt = MagicLinkAttempt(
-        email=email,
-        ip_address=request.client.host if request.client else None
+    # Audit log is off the hot path
+    background_tasks.add_task(
+        record_magic_link_attempt,
+        email,
+        request.client.host if request.client else None,
     )
-    db.add(attempt)
     
     # Get or create user
-    user = db.query(User).filter(User.email == email).first()
+    user = (await db.execute(
+        select(User).where(User.email == email)
+    )).scalar_one_or_none()
     if not user:
         user = User(email=email)
         db.add(user)
     
     # Generate magic link token
     token = generate_magic_token()
-    user.magic_link_token = token
-    user.magic_link_expires = datetime.utcnow() + timedelta(
-        minutes=settings.magic_link_expires_minutes
-    )
+    user.magic_link_token_hash = hash_token(token)
+    user.magic_link_expires = datetime.now(timezone.utc) + MAGIC_LINK_TTL
     
-    db.commit()
+    await db.commit()
     
     # Build magic link URL
-    magic_link_url = f"{settings.frontend_url}/auth/verify?token={token}"
-    
-    # Send email
-    if settings.resend_api_key:
-        try:
-            resend.Emails.send({
-                "from": "Hindsight Economics <noreply@notifications.diftar.co>",
-                "to": [email],
-                "subject": "Your login link for Hindsight Economics",
-                "html": f"""
-                    <div style="font-family: sans-serif; max-width: 600px; margin: 0 auto;">
-                        <h1 style="color: #3b82f6;">Hindsight Economics</h1>
-                        <p>Click the link below to log in:</p>
-                        <p>
-                            <a href="{magic_link_url}" 
-                               style="display: inline-block; background: #3b82f6; color: white; 
-                                      padding: 12px 24px; text-decoration: none; border-radius: 8px;">
-                                Log In
-                            </a>
-                        </p>
-                        <p style="color: #666; font-size: 14px;">
-                            This link expires in {settings.magic_link_expires_minutes} minutes.
-                        </p>
-                        <p style="color: #666; font-size: 14px;">
-                            If you didn't request this, you can safely ignore this email.
-                        </p>
-                    </div>
-                """
-            })
-        except Exception as e:
-            # Log the magic link so you can still use it (helpful for testing with Resend free tier)
-            print(f"[EMAIL FAILED] Magic link for {email}: {magic_link_url}")
-            print(f"[EMAIL ERROR] {e}")
-            # NOTE: On Resend's free tier, you can only send to the email you registered with.
-            # To send to other emails: 1) Verify your own domain in Resend, or 2) Add emails to Resend Audience
-            if settings.environment == "production":
-                raise HTTPException(
-                    status_code=500, 
-                    detail="Failed to send email. If using Resend free tier, you may need to verify a custom domain."
-                )
+    magic_link_url = MAGIC_LINK_URL_PREFIX + token
+    
+    # Send email after the response goes out
+    if SEND_EMAILS:
+        background_tasks.add_task(send_magic_link_email, email, magic_link_url)
     else:
         # In development without Resend, log the link
         print(f"[DEV] Magic link for {email}: {magic_link_url}")
@@ -170,71 +284,95 @@ def request_magic_link(
 
 
 @router.get("/verify")
-def verify_magic_link(
+async def verify_magic_link(
     token: str,
     game_token: Optional[str] = None,  # Optional: link a recent game
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Verify magic link and create session."""
-    user = db.query(User).filter(
-        User.magic_link_token == token,
-        User.magic_link_expires > datetime.utcnow()
-    ).first()
+    session_token = generate_magic_token()
     
-    if not user:
-        raise HTTPException(status_code=400, detail="Invalid or expired link")
+    # Consume the magic link and open the session in a single statement
+    verified = (
+        update(User)
+        .where(
+            User.magic_link_token_hash == hash_token(token),
+            User.magic_link_expires > func.now(),
+        )
+        .values(
+            magic_link_token_hash=None,
+            magic_link_token=None,
+            magic_link_expires=None,
+            session_token_hash=hash_token(session_token),
+            session_token=None,
+            session_expires=func.now() + SESSION_TTL,
+            last_login=func.now(),
+        )
+        .returning(User.id, User.username)
+        .cte("verified")
+    )
+    stmt = select(verified.c.id, verified.c.username)
     
-    # Clear magic link token
-    user.magic_link_token = None
-    user.magic_link_expires = None
+    # Link recent anonymous game if provided, as a second writable CTE
+    if game_token:
+        linked = (
+            update(GameSession)
+            .where(
+                GameSession.session_token == game_token,
+                GameSession.user_id.is_(None),
+                exists(select(verified.c.id)),
+            )
+            .values(
+                user_id=select(verified.c.id).scalar_subquery(),
+                # Keep the game's username, else take the user's
+                username=func.coalesce(
+                    GameSession.username,
+                    select(verified.c.username).scalar_subquery(),
+                ),
+            )
+            .returning(GameSession.id)
+            .cte("linked")
+        )
+        # Not referenced by the SELECT, so attach it explicitly
+        stmt = stmt.add_cte(linked)
     
-    # Create session
-    session_token = generate_magic_token()
-    user.session_token = session_token
-    user.session_expires = datetime.utcnow() + timedelta(days=settings.session_expires_days)
-    user.last_login = datetime.utcnow()
+    user = (await db.execute(stmt)).first()
+    
+    if not user:
+        raise HTTPException(status_code=400, detail="Invalid or expired link")
     
-    # Link recent anonymous game if provided
+    await db.commit()
     if game_token:
-        game = db.query(GameSession).filter(
-            GameSession.session_token == game_token,
-            GameSession.user_id.is_(None)
-        ).first()
-        if game:
-            game.user_id = user.id
-            # Update username if user has one and game doesn't
-            if user.username and not game.username:
-                game.username = user.username
-    
-    db.commit()
+        # Linking may have given a completed game a username
+        await invalidate_leaderboard_cache()
     
     # Return JSON response with cookie set
     # (Frontend handles redirect - can't set cookies via redirect with redirect: 'manual')
-    response = Response(
-        content='{"success": true, "has_username": ' + ('true' if user.username else 'false') + '}',
-        media_type="application/json"
-    )
+    response = ORJSONResponse({"success": True, "has_username": bool(user.username)})
     response.set_cookie(
         key="session_token",
         value=session_token,
         httponly=True,
-        secure=settings.environment == "production",
+        secure=SECURE_COOKIES,
         samesite="none",
-        max_age=settings.session_expires_days * 24 * 60 * 60
+        max_age=SESSION_COOKIE_MAX_AGE
     )
     
     return response
 
 
 @router.post("/logout")
-def logout(response: Response, db: Session = Depends(get_db)):
+async def logout(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     """Log out - clear session."""
+    session_token = request.cookies.get("session_token")
+    if session_token:
+        await cache_delete(_session_cache_key(session_token))
     response.delete_cookie("session_token")
     return {"message": "Logged out"}
 
 
 @router.get("/me", response_model=UserResponse)
-def get_me(user: User = Depends(require_auth)):
+async def get_me(user: User = Depends(load_full_user)):
     """Get current user info."""
     return UserResponse(
         id=user.id,
@@ -247,10 +385,12 @@ def get_me(user: User = Depends(require_auth)):
 
 
 @router.post("/username", response_model=UserResponse)
-def set_username(
+async def set_username(
     data: SetUsernameRequest,
-    user: User = Depends(require_auth),
-    db: Session = Depends(get_db)
+    request: Request,
+    background_tasks: BackgroundTasks,
+    user: User = Depends(load_full_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Set or update username."""
     username = data.username.strip()
@@ -269,22 +409,25 @@ def set_username(
         )
     
     # Check if username is taken
-    existing = db.query(User).filter(
-        User.username == username,
-        User.id != user.id
-    ).first()
+    existing = (await db.execute(
+        select(User.id).where(
+            User.username == username,
+            User.id != user.id
+        )
+    )).first()
     
     if existing:
         raise HTTPException(status_code=400, detail="Username already taken")
     
     user.username = username
     
-    # Update any games to use this username
-    db.query(GameSession).filter(
-        GameSession.user_id == user.id
-    ).update({GameSession.username: username})
+    await db.commit()
+    
+    # Update any games to use this username, after the response is sent
+    background_tasks.add_task(backfill_game_usernames, user.id, username)
     
-    db.commit()
+    # Cached session still carries the old username
+    await cache_delete(_session_cache_key(request.cookies.get("session_token")))
     
     return UserResponse(
         id=user.id,
@@ -296,31 +439,91 @@ def set_username(
     )
 
 
-@router.post("/link-game/{game_token}")
-def link_game_to_user(
+class AuthWithGame(NamedTuple):
+    """Logged-in user plus the game named in the path (None if not found)."""
+    user: SessionUser
+    game_id: Optional[int]
+    game_user_id: Optional[int]
+    game_username: Optional[str]
+
+
+async def require_auth_with_game(
     game_token: str,
-    user: User = Depends(require_auth),
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+) -> AuthWithGame:
+    """
+    Like require_auth, but fetches the game in the same round trip.
+    
+    The session lookup LEFT JOINs the game by token, so endpoints that act on
+    a game don't need a second query after authenticating.
+    """
+    session_token = request.cookies.get("session_token")
+    if not session_token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    row = (await db.execute(
+        select(
+            User.id,
+            User.username,
+            User.email,
+            User.session_expires,
+            GameSession.id.label("game_id"),
+            GameSession.user_id.label("game_user_id"),
+            GameSession.username.label("game_username"),
+        )
+        .select_from(User)
+        .outerjoin(GameSession, GameSession.session_token == game_token)
+        .where(
+            User.session_token_hash == hash_token(session_token),
+            User.session_expires > func.now(),
+        )
+    )).first()
+    
+    if not row:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    return AuthWithGame(
+        user=SessionUser(
+            id=row.id,
+            username=row.username,
+            email=row.email,
+            session_expires=row.session_expires,
+        ),
+        game_id=row.game_id,
+        game_user_id=row.game_user_id,
+        game_username=row.game_username,
+    )
+
+
+@router.post("/link-game/{game_token}")
+async def link_game_to_user(
+    auth: AuthWithGame = Depends(require_auth_with_game),
+    db: AsyncSession = Depends(get_db)
 ):
     """Link an anonymous game to the current user."""
-    game = db.query(GameSession).filter(
-        GameSession.session_token == game_token
-    ).first()
+    user = auth.user
     
-    if not game:
+    if auth.game_id is None:
         raise HTTPException(status_code=404, detail="Game not found")
     
-    if game.user_id is not None and game.user_id != user.id:
+    if auth.game_user_id is not None and auth.game_user_id != user.id:
         raise HTTPException(status_code=400, detail="Game belongs to another user")
     
-    if game.user_id == user.id:
+    if auth.game_user_id == user.id:
         return {"message": "Game already linked"}
     
-    game.user_id = user.id
-    if user.username and not game.username:
-        game.username = user.username
+    values = {"user_id": user.id}
+    if user.username and not auth.game_username:
+        values["username"] = user.username
     
-    db.commit()
+    await db.execute(
+        update(GameSession)
+        .where(GameSession.id == auth.game_id)
+        .values(**values)
+    )
+    await db.commit()
+    if "username" in values:
+        await invalidate_leaderboard_cache()
     
     return {"message": "Game linked to your account"}
-
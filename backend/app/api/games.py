@@ -1,29 +1,38 @@
 """Game session API endpoints."""
 import uuid
-from datetime import datetime
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Request
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Optional
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 
 from app.database import get_db
-from app.models import Scenario, ScenarioData, GameSession, User
-from app.api.auth import get_current_user
+from app.models import Scenario, GameSession, User
+from app.api.auth import SessionUser, get_current_user
+from app.api.leaderboard import invalidate_leaderboard_cache
 from app.schemas import (
     GameCreateInput,
     GameSessionOut,
     GameRevealOut,
-    PredictionResult,
     AllocationInput,
     ScenarioDataOut,
 )
 from app.schemas.game import MonthlyDataOut
+from app.services.scenario_cache import ScenarioCache, get_scenario_cache
 from app.services.scoring import ScoringService
 
 router = APIRouter()
 
+# Validates a whole list of ORM rows in one pydantic-core call
+_MONTHLY_ADAPTER = TypeAdapter(List[MonthlyDataOut])
+
 # Historical descriptions for each scenario period
-HISTORICAL_DESCRIPTIONS = {
+HISTORICAL_DESCRIPTIONS = MappingProxyType({
     "Oil Crisis & Stagflation": (
         "The 1973 oil embargo sent shockwaves through the global economy. OPEC's production cuts "
         "quadrupled oil prices, triggering a severe recession combined with high inflation—a toxic "
@@ -114,7 +123,26 @@ HISTORICAL_DESCRIPTIONS = {
         "in history (falling 34% in just 23 days), and unprecedented fiscal and monetary stimulus. "
         "The subsequent recovery would be equally dramatic."
     ),
-}
+})
+
+
+def _shift_months(d: date, months: int) -> date:
+    """First of the month `months` away from d's month."""
+    year, month = divmod(d.year * 12 + d.month - 1 + months, 12)
+    return date(year, month + 1, 1)
+
+
+@lru_cache(maxsize=512)
+def _format_period(scenario_start: date) -> str:
+    """
+    Human-readable window for a scenario, e.g. "January 1973 - December 1975".
+    
+    actual_start_date is month 24 (end of historical period); the window
+    starts 23 months before it (month 1) and ends 12 months after (month 36).
+    """
+    window_start = _shift_months(scenario_start, -23)  # Month 1
+    window_end = _shift_months(scenario_start, 12)  # Month 36
+    return f"{window_start.strftime('%B %Y')} - {window_end.strftime('%B %Y')}"
 
 
 def generate_dynamic_description(scenario: Scenario, monthly_data: list) -> str:
@@ -130,9 +158,9 @@ def generate_dynamic_description(scenario: Scenario, monthly_data: list) -> str:
         return None
     
     # Calculate returns from the scenario
-    stock_return = float(scenario.fwd_return_stocks) * 100
-    bond_return = float(scenario.fwd_return_bonds) * 100
-    gold_return = float(scenario.fwd_return_gold) * 100
+    stock_return = scenario.fwd_return_stocks * 100
+    bond_return = scenario.fwd_return_bonds * 100
+    gold_return = scenario.fwd_return_gold * 100
     
     # Get GDP and unemployment changes
     start_gdp = historical_data[-1].gdp_growth_yoy if historical_data[-1].gdp_growth_yoy else None
@@ -174,30 +202,30 @@ def generate_dynamic_description(scenario: Scenario, monthly_data: list) -> str:
     # GDP trend
     gdp_desc = ""
     if start_gdp is not None and end_gdp is not None:
-        gdp_change = float(end_gdp) - float(start_gdp)
+        gdp_change = end_gdp - start_gdp
         if gdp_change > 2:
-            gdp_desc = f"GDP growth accelerated from {float(start_gdp):.1f}% to {float(end_gdp):.1f}%"
+            gdp_desc = f"GDP growth accelerated from {start_gdp:.1f}% to {end_gdp:.1f}%"
         elif gdp_change < -2:
-            gdp_desc = f"GDP growth slowed significantly from {float(start_gdp):.1f}% to {float(end_gdp):.1f}%"
-        elif float(end_gdp) < 0:
-            gdp_desc = f"The economy contracted with GDP at {float(end_gdp):.1f}%"
-        elif float(end_gdp) > 3:
-            gdp_desc = f"The economy grew robustly at {float(end_gdp):.1f}%"
+            gdp_desc = f"GDP growth slowed significantly from {start_gdp:.1f}% to {end_gdp:.1f}%"
+        elif end_gdp < 0:
+            gdp_desc = f"The economy contracted with GDP at {end_gdp:.1f}%"
+        elif end_gdp > 3:
+            gdp_desc = f"The economy grew robustly at {end_gdp:.1f}%"
         else:
-            gdp_desc = f"The economy grew moderately at {float(end_gdp):.1f}%"
+            gdp_desc = f"The economy grew moderately at {end_gdp:.1f}%"
     
     # Unemployment trend
     unemp_desc = ""
     if start_unemp is not None and end_unemp is not None:
-        unemp_change = float(end_unemp) - float(start_unemp)
+        unemp_change = end_unemp - start_unemp
         if unemp_change > 1:
-            unemp_desc = f"unemployment rose from {float(start_unemp):.1f}% to {float(end_unemp):.1f}%"
+            unemp_desc = f"unemployment rose from {start_unemp:.1f}% to {end_unemp:.1f}%"
         elif unemp_change < -1:
-            unemp_desc = f"unemployment fell from {float(start_unemp):.1f}% to {float(end_unemp):.1f}%"
-        elif float(end_unemp) > 7:
-            unemp_desc = f"unemployment remained elevated at {float(end_unemp):.1f}%"
-        elif float(end_unemp) < 5:
-            unemp_desc = f"unemployment stayed low at {float(end_unemp):.1f}%"
+            unemp_desc = f"unemployment fell from {start_unemp:.1f}% to {end_unemp:.1f}%"
+        elif end_unemp > 7:
+            unemp_desc = f"unemployment remained elevated at {end_unemp:.1f}%"
+        elif end_unemp < 5:
+            unemp_desc = f"unemployment stayed low at {end_unemp:.1f}%"
     
     # Combine economic context
     if gdp_desc and unemp_desc:
@@ -227,20 +255,18 @@ def generate_dynamic_description(scenario: Scenario, monthly_data: list) -> str:
 
 
 @router.post("/", response_model=GameSessionOut)
-def create_game(
+async def create_game(
     game_input: GameCreateInput, 
-    request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    scenarios: ScenarioCache = Depends(get_scenario_cache),
+    current_user: Optional[SessionUser] = Depends(get_current_user)
 ):
     """
     Create a new game session with predictions, allocation, and rationale.
     Returns a session token for retrieving results.
     """
-    # Get current user if authenticated
-    current_user = get_current_user(request, db)
-    
-    # Verify scenario exists
-    scenario = db.query(Scenario).filter(Scenario.id == game_input.scenario_id).first()
+    # Verify scenario exists (monthly data is needed for scoring)
+    scenario = await scenarios.get(db, game_input.scenario_id)
     if not scenario:
         raise HTTPException(status_code=404, detail="Scenario not found")
     
@@ -269,109 +295,75 @@ def create_game(
         rationale=game_input.rationale or "",
     )
     
+    # Score now, so reveal only reads stored results
+    _apply_scores(game_session, scenario, scenarios)
+    
     db.add(game_session)
-    db.commit()
-    db.refresh(game_session)
+    await db.commit()
     
     return game_session
 
 
 @router.get("/{session_token}/reveal", response_model=GameRevealOut)
-def reveal_game(session_token: str, db: Session = Depends(get_db)):
+async def reveal_game(
+    session_token: str,
+    db: AsyncSession = Depends(get_db),
+    scenarios: ScenarioCache = Depends(get_scenario_cache)
+):
     """
     Reveal the game results including actual outcomes, scores, and period details.
-    This calculates and stores the scores if not already computed.
+    Scores are computed at creation; the first reveal marks the game completed.
     """
-    # Get game session
-    game = (
-        db.query(GameSession)
-        .filter(GameSession.session_token == session_token)
-        .first()
-    )
+    # Get game session; its scenario comes from the cache, so any lazy
+    # relationship access here would be an accidental extra query
+    game = (await db.execute(
+        select(GameSession)
+        .where(GameSession.session_token == session_token)
+        .options(raiseload('*'))
+    )).scalar_one_or_none()
     
     if not game:
         raise HTTPException(status_code=404, detail="Game session not found")
     
-    # Get scenario
-    scenario = db.query(Scenario).filter(Scenario.id == game.scenario_id).first()
-    
-    # Get all monthly data including forward period
-    all_data = (
-        db.query(ScenarioData)
-        .filter(ScenarioData.scenario_id == scenario.id)
-        .order_by(ScenarioData.month_index)
-        .all()
-    )
-    
-    # Extract forward period data for monthly returns calculation
-    forward_data = [d for d in all_data if d.is_forward]
-    
-    # Calculate monthly returns for Sharpe calculation
-    monthly_returns = _calculate_monthly_returns(all_data)
+    # Scenario and all monthly data including the forward period; the
+    # game's foreign key guarantees it still exists
+    scenario = await scenarios.get(db, game.scenario_id, check_exists=False)
+    all_data = scenario.monthly_data
     
-    # Prepare predictions dict
-    predictions = {
-        'above_15pct': float(game.pred_above_15pct),
-        'above_10pct': float(game.pred_above_10pct),
-        'above_5pct': float(game.pred_above_5pct),
-        'above_0pct': float(game.pred_above_0pct),
-    }
-    
-    # Prepare returns dict
-    returns = {
-        'stocks': float(scenario.fwd_return_stocks),
-        'bonds': float(scenario.fwd_return_bonds),
-        'cash': float(scenario.fwd_return_cash),
-        'gold': float(scenario.fwd_return_gold),
-    }
-    
-    # Prepare allocation dict
-    allocation = {
-        'stocks': game.alloc_stocks,
-        'bonds': game.alloc_bonds,
-        'cash': game.alloc_cash,
-        'gold': game.alloc_gold,
-    }
+    # Games created before scoring moved to create_game
+    if game.brier_score is None:
+        _apply_scores(game, scenario, scenarios)
     
-    # Calculate scores
-    brier_score, prediction_results = ScoringService.calculate_brier_score(
+    # First reveal marks the game completed (and eligible for the leaderboard)
+    if game.completed_at is None:
+        game.completed_at = datetime.now(timezone.utc)
+        await db.commit()
+        if game.username:
+            await invalidate_leaderboard_cache()
+    
+    predictions = _predictions(game)
+    allocation = _allocation(game)
+    returns = _asset_returns(scenario)
+    
+    brier_score = game.brier_score
+    portfolio_return = game.portfolio_return
+    portfolio_sharpe = game.portfolio_sharpe
+    excess_return = game.vs_benchmark_return
+    excess_sharpe = game.vs_benchmark_sharpe
+    
+    # Per-threshold breakdown and the optimal (hindsight) portfolio follow
+    # from the stored scores without re-running the Sharpe math
+    _, prediction_results = ScoringService.calculate_brier_score(
         predictions, returns['stocks']
     )
-    
-    portfolio_return = ScoringService.calculate_portfolio_return(allocation, returns)
-    
-    risk_free_return = returns['cash']  # T-bill return as risk-free
-    portfolio_sharpe = ScoringService.calculate_portfolio_sharpe(
-        allocation, monthly_returns, risk_free_return
-    )
-    
-    # Calculate optimal allocation (hindsight-based comparison)
-    optimal_metrics = ScoringService.calculate_optimal_metrics(
-        returns, monthly_returns, risk_free_return
-    )
-    
-    # Compare to optimal allocation (not 60/40)
-    excess_return = portfolio_return - optimal_metrics['return']
-    excess_sharpe = portfolio_sharpe - optimal_metrics['sharpe']
-    
-    # Update game session with scores if not already done
-    if game.completed_at is None:
-        game.brier_score = brier_score
-        game.portfolio_return = portfolio_return
-        game.portfolio_sharpe = portfolio_sharpe
-        game.vs_benchmark_return = excess_return  # Now vs optimal allocation
-        game.vs_benchmark_sharpe = excess_sharpe  # Now vs optimal allocation
-        game.completed_at = datetime.utcnow()
-        db.commit()
+    optimal_metrics = {
+        'allocation': ScoringService.calculate_optimal_allocation(returns),
+        'return': round(portfolio_return - excess_return, 4),
+        'sharpe': round(portfolio_sharpe - excess_sharpe, 4),
+    }
     
     # Format period string
-    # actual_start_date is month 24 (end of historical period)
-    # Window starts 24 months before, ends 12 months after
-    from dateutil.relativedelta import relativedelta
-    scenario_start = scenario.actual_start_date
-    window_start = scenario_start - relativedelta(months=23)  # Month 1
-    window_end = scenario_start + relativedelta(months=12)  # Month 36
-    actual_period = f"{window_start.strftime('%B %Y')} - {window_end.strftime('%B %Y')}"
+    actual_period = _format_period(scenario.actual_start_date)
     
     # Get historical description - use pre-written if available, otherwise generate dynamically
     historical_description = HISTORICAL_DESCRIPTIONS.get(scenario.historical_context, None)
@@ -379,23 +371,13 @@ def reveal_game(session_token: str, db: Session = Depends(get_db)):
         historical_description = generate_dynamic_description(scenario, all_data)
     
     # Convert monthly data for response
-    monthly_data_out = [
-        MonthlyDataOut(
-            month_index=d.month_index,
-            is_forward=d.is_forward,
-            idx_stocks=float(d.idx_stocks),
-            idx_bonds=float(d.idx_bonds),
-            idx_cash=float(d.idx_cash),
-            idx_gold=float(d.idx_gold),
-            gdp_growth_yoy=float(d.gdp_growth_yoy) if d.gdp_growth_yoy else None,
-            unemployment_rate=float(d.unemployment_rate) if d.unemployment_rate else None,
-            inflation_rate_yoy=float(d.inflation_rate_yoy) if d.inflation_rate_yoy else None,
-            fed_funds_rate=float(d.fed_funds_rate) if d.fed_funds_rate else None,
-            industrial_prod_yoy=float(d.industrial_prod_yoy) if d.industrial_prod_yoy else None,
-        )
-        for d in all_data
-    ]
+    monthly_data_out = scenario.monthly_data_json
+    if monthly_data_out is None:
+        monthly_data_out = _MONTHLY_ADAPTER.validate_python(all_data, from_attributes=True)
     
+    # Allocations were validated on the way in or computed here, so they
+    # skip a second round of validation; the per-threshold result dicts are
+    # built into PredictionResults by pydantic-core in one pass
     return GameRevealOut(
         session_token=session_token,
         actual_start_date=str(scenario.actual_start_date),
@@ -403,13 +385,13 @@ def reveal_game(session_token: str, db: Session = Depends(get_db)):
         historical_context=scenario.historical_context,
         historical_description=historical_description,
         monthly_data=monthly_data_out,
-        prediction_results=[PredictionResult(**r) for r in prediction_results],
+        prediction_results=prediction_results,
         brier_score=brier_score,
-        allocation=AllocationInput(**allocation),
+        allocation=AllocationInput.model_construct(**allocation),
         asset_returns=returns,
         portfolio_return=portfolio_return,
         portfolio_sharpe=portfolio_sharpe,
-        optimal_allocation=AllocationInput(**optimal_metrics['allocation']),
+        optimal_allocation=AllocationInput.model_construct(**optimal_metrics['allocation']),
         optimal_return=optimal_metrics['return'],
         optimal_sharpe=optimal_metrics['sharpe'],
         benchmark_return=optimal_metrics['return'],  # Now comparing to optimal
@@ -420,31 +402,97 @@ def reveal_game(session_token: str, db: Session = Depends(get_db)):
     )
 
 
+def _predictions(game: GameSession) -> dict:
+    return {
+        'above_15pct': game.pred_above_15pct,
+        'above_10pct': game.pred_above_10pct,
+        'above_5pct': game.pred_above_5pct,
+        'above_0pct': game.pred_above_0pct,
+    }
+
+
+def _allocation(game: GameSession) -> dict:
+    return {
+        'stocks': game.alloc_stocks,
+        'bonds': game.alloc_bonds,
+        'cash': game.alloc_cash,
+        'gold': game.alloc_gold,
+    }
+
+
+def _asset_returns(scenario: Scenario) -> dict:
+    return {
+        'stocks': scenario.fwd_return_stocks,
+        'bonds': scenario.fwd_return_bonds,
+        'cash': scenario.fwd_return_cash,
+        'gold': scenario.fwd_return_gold,
+    }
+
+
+def _apply_scores(game: GameSession, scenario: Scenario, scenarios: ScenarioCache) -> None:
+    """Score the game against its scenario's outcome and store the results on it."""
+    predictions = _predictions(game)
+    allocation = _allocation(game)
+    returns = _asset_returns(scenario)
+    
+    # Monthly returns for Sharpe calculation, precomputed by the pipeline
+    monthly_returns = scenario.monthly_returns or _calculate_monthly_returns(scenario.monthly_data)
+    
+    brier_score, _ = ScoringService.calculate_brier_score(
+        predictions, returns['stocks']
+    )
+    
+    portfolio_return = ScoringService.calculate_portfolio_return(allocation, returns)
+    
+    risk_free_return = returns['cash']  # T-bill return as risk-free
+    portfolio_sharpe = ScoringService.calculate_portfolio_sharpe(
+        allocation, monthly_returns, risk_free_return
+    )
+    
+    # Optimal allocation (hindsight-based comparison). It depends only on
+    # the scenario, so it is computed once per cached scenario
+    optimal_metrics = scenarios.optimal_metrics.get(scenario.id)
+    if optimal_metrics is None:
+        optimal_metrics = ScoringService.calculate_optimal_metrics(
+            returns, monthly_returns, risk_free_return
+        )
+        scenarios.optimal_metrics[scenario.id] = optimal_metrics
+    
+    game.brier_score = brier_score
+    game.portfolio_return = portfolio_return
+    game.portfolio_sharpe = portfolio_sharpe
+    # Compare to optimal allocation (not 60/40)
+    game.vs_benchmark_return = portfolio_return - optimal_metrics['return']
+    game.vs_benchmark_sharpe = portfolio_sharpe - optimal_metrics['sharpe']
+
+
 class UsernameInput(BaseModel):
     username: str
 
 
 @router.post("/{session_token}/leaderboard")
-def join_leaderboard(session_token: str, data: UsernameInput, db: Session = Depends(get_db)):
+async def join_leaderboard(session_token: str, data: UsernameInput, db: AsyncSession = Depends(get_db)):
     """Opt into the leaderboard with a username."""
-    game = (
-        db.query(GameSession)
-        .filter(GameSession.session_token == session_token)
-        .first()
-    )
+    # Validate username
+    if len(data.username) < 3 or len(data.username) > 50:
+        raise HTTPException(status_code=400, detail="Username must be 3-50 characters")
     
-    if not game:
+    row = (await db.execute(
+        update(GameSession)
+        .where(GameSession.session_token == session_token)
+        .values(username=data.username)
+        .returning(GameSession.completed_at)
+    )).first()
+    
+    if not row:
         raise HTTPException(status_code=404, detail="Game session not found")
     
-    if game.completed_at is None:
+    if row.completed_at is None:
+        await db.rollback()
         raise HTTPException(status_code=400, detail="Game must be completed first")
     
-    # Validate username
-    if len(data.username) < 3 or len(data.username) > 50:
-        raise HTTPException(status_code=400, detail="Username must be 3-50 characters")
-    
-    game.username = data.username
-    db.commit()
+    await db.commit()
+    await invalidate_leaderboard_cache()
     
     return {"message": "Successfully joined leaderboard", "username": data.username}
 
@@ -454,61 +502,44 @@ class ReflectionInput(BaseModel):
 
 
 @router.post("/{session_token}/reflection")
-def add_reflection(session_token: str, data: ReflectionInput, db: Session = Depends(get_db)):
+async def add_reflection(session_token: str, data: ReflectionInput, db: AsyncSession = Depends(get_db)):
     """Add a reflection after seeing results."""
-    game = (
-        db.query(GameSession)
-        .filter(GameSession.session_token == session_token)
-        .first()
-    )
-    
-    if not game:
+    row = (await db.execute(
+        update(GameSession)
+        .where(GameSession.session_token == session_token)
+        .values(reflection=data.reflection)
+        .returning(GameSession.id)
+    )).first()
+    
+    if not row:
         raise HTTPException(status_code=404, detail="Game session not found")
     
-    game.reflection = data.reflection
-    db.commit()
+    await db.commit()
     
     return {"message": "Reflection saved"}
 
 
 def _calculate_monthly_returns(all_data: list) -> dict:
     """Calculate monthly returns from indexed price data."""
-    monthly_returns = {
-        'stocks': [],
-        'bonds': [],
-        'cash': [],
-        'gold': [],
-    }
+    # Month 24 is the base for the first forward return; all_data is
+    # already ordered by month_index
+    rows = [d for d in all_data if d.month_index >= 24]
+    
+    if len(rows) < 2 or rows[0].month_index != 24:
+        return {'stocks': [], 'bonds': [], 'cash': [], 'gold': []}
+    
+    idx = np.array(
+        [
+            [d.idx_stocks, d.idx_bonds, d.idx_cash, d.idx_gold]
+            for d in rows
+        ],
+        dtype=np.float64,
+    )
+    rets = np.diff(idx, axis=0) / idx[:-1]
     
-    # We need months 24-36 for forward period monthly returns (12 months)
-    forward_months = [d for d in all_data if d.month_index > 24]
-    
-    # Get month 24 as the base for first forward return
-    month_24 = next((d for d in all_data if d.month_index == 24), None)
-    
-    if month_24 and forward_months:
-        prev_stocks = float(month_24.idx_stocks)
-        prev_bonds = float(month_24.idx_bonds)
-        prev_cash = float(month_24.idx_cash)
-        prev_gold = float(month_24.idx_gold)
-        
-        for month in sorted(forward_months, key=lambda x: x.month_index):
-            monthly_returns['stocks'].append(
-                (float(month.idx_stocks) - prev_stocks) / prev_stocks
-            )
-            monthly_returns['bonds'].append(
-                (float(month.idx_bonds) - prev_bonds) / prev_bonds
-            )
-            monthly_returns['cash'].append(
-                (float(month.idx_cash) - prev_cash) / prev_cash
-            )
-            monthly_returns['gold'].append(
-                (float(month.idx_gold) - prev_gold) / prev_gold
-            )
-            
-            prev_stocks = float(month.idx_stocks)
-            prev_bonds = float(month.idx_bonds)
-            prev_cash = float(month.idx_cash)
-            prev_gold = float(month.idx_gold)
-    
-    return monthly_returns
+    return {
+        'stocks': rets[:, 0].tolist(),
+        'bonds': rets[:, 1].tolist(),
+        'cash': rets[:, 2].tolist(),
+        'gold': rets[:, 3].tolist(),
+    }
@@ -1,168 +1,241 @@
 """Leaderboard API endpoints."""
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, List, Tuple
 
+from app.cache import cache_delete, cache_get, cache_set
+from app.config import get_settings
 from app.database import get_db
 from app.models import GameSession
 from app.schemas import LeaderboardOut, LeaderboardEntry
 
 router = APIRouter()
+settings = get_settings()
 
+# Boards change only when a game is scored or joins the leaderboard, and
+# those paths invalidate; the TTL is a backstop
+LEADERBOARD_CACHE_PREFIX = "lb:v1:"
+LEADERBOARD_CACHE_TTL_SECONDS = 45
+LEADERBOARD_MAX_LIMIT = 100
+# Every key a board can be cached under (one per limit), so invalidation
+# deletes them directly rather than SCANning the whole keyspace
+LEADERBOARD_CACHE_KEYS = tuple(
+    f"{LEADERBOARD_CACHE_PREFIX}{limit}" for limit in range(1, LEADERBOARD_MAX_LIMIT + 1)
+)
 
-def get_recent_stats(db: Session, usernames: List[str]) -> Dict[str, Tuple]:
+USE_LATERAL_RECENT_STATS = settings.leaderboard_recent_stats_query == "lateral"
+
+
+def _recent_stats_window(usernames: List[str]):
+    """Last-5 averages via row_number() over each user's completed games."""
+    rn = func.row_number().over(
+        partition_by=GameSession.username,
+        order_by=GameSession.completed_at.desc(),
+    ).label("rn")
+    ranked = (
+        select(
+            GameSession.username,
+            GameSession.brier_score,
+            GameSession.portfolio_sharpe,
+            GameSession.vs_benchmark_return,
+            rn,
+        )
+        .where(
+            GameSession.username.in_(usernames),
+            GameSession.completed_at.isnot(None),
+        )
+        .subquery()
+    )
+    # Missing scores count as 0
+    return (
+        select(
+            ranked.c.username,
+            func.avg(func.coalesce(ranked.c.brier_score, 0)).label("avg_brier"),
+            func.avg(func.coalesce(ranked.c.portfolio_sharpe, 0)).label("avg_sharpe"),
+            func.avg(func.coalesce(ranked.c.vs_benchmark_return, 0)).label("avg_excess"),
+        )
+        .where(ranked.c.rn <= 5)
+        .group_by(ranked.c.username)
+        .having(func.count() >= 5)
+    )
+
+
+# Per-username LIMIT 5 probes of ix_gs_leaderboard_scores; reads only 5 rows per
+# user instead of numbering every completed game of each user
+_RECENT_STATS_LATERAL = text("""
+    SELECT u.username,
+           AVG(COALESCE(g.brier_score, 0)) AS avg_brier,
+           AVG(COALESCE(g.portfolio_sharpe, 0)) AS avg_sharpe,
+           AVG(COALESCE(g.vs_benchmark_return, 0)) AS avg_excess
+    FROM unnest(CAST(:usernames AS text[])) AS u(username)
+    CROSS JOIN LATERAL (
+        SELECT brier_score, portfolio_sharpe, vs_benchmark_return
+        FROM game_sessions
+        WHERE username = u.username AND completed_at IS NOT NULL
+        ORDER BY completed_at DESC
+        LIMIT 5
+    ) g
+    GROUP BY u.username
+    HAVING COUNT(*) >= 5
+""")
+
+
+async def get_recent_stats(db: AsyncSession, usernames: List[str]) -> Dict[str, Tuple]:
     """Get last 5 games stats for each username."""
-    recent_stats = {}
+    recent_stats = {uname: (None, None, None) for uname in usernames}
+    if not usernames:
+        return recent_stats
+    
+    if USE_LATERAL_RECENT_STATS:
+        result = await db.execute(_RECENT_STATS_LATERAL, {"usernames": usernames})
+    else:
+        result = await db.execute(_recent_stats_window(usernames))
     
-    for uname in usernames:
-        recent_games = (
-            db.query(GameSession)
-            .filter(
-                GameSession.username == uname,
-                GameSession.completed_at.isnot(None),
-            )
-            .order_by(GameSession.completed_at.desc())
-            .limit(5)
-            .all()
+    for row in result.all():
+        recent_stats[row.username] = (
+            round(float(row.avg_brier), 4),
+            round(float(row.avg_sharpe), 4),
+            round(float(row.avg_excess), 4),
         )
-        
-        if len(recent_games) >= 5:
-            avg_brier = sum(float(g.brier_score or 0) for g in recent_games) / 5
-            avg_sharpe = sum(float(g.portfolio_sharpe or 0) for g in recent_games) / 5
-            avg_excess = sum(float(g.vs_benchmark_return or 0) for g in recent_games) / 5
-            recent_stats[uname] = (
-                round(avg_brier, 4),
-                round(avg_sharpe, 4),
-                round(avg_excess, 4),
-            )
-        else:
-            recent_stats[uname] = (None, None, None)
     
     return recent_stats
 
 
-@router.get("/", response_model=LeaderboardOut)
-def get_leaderboard(
-    limit: int = Query(default=50, ge=1, le=100),
-    username: str = Query(default=None, description="Get rank for specific user"),
-    db: Session = Depends(get_db)
-):
-    """
-    Get the leaderboard with top players.
-    Includes all-time stats and last 5 games performance.
-    """
-    # Aggregate all-time stats by username
-    leaderboard_query = (
-        db.query(
+def _all_time_stats():
+    """All-time stats per username, best first."""
+    avg_brier = func.avg(GameSession.brier_score)
+    avg_sharpe = func.avg(GameSession.portfolio_sharpe)
+    return (
+        select(
             GameSession.username,
-            func.count(GameSession.id).label('games_played'),
-            func.avg(GameSession.brier_score).label('avg_brier_score'),
-            func.avg(GameSession.portfolio_sharpe).label('avg_sharpe'),
+            func.count().label('games_played'),
+            avg_brier.label('avg_brier_score'),
+            avg_sharpe.label('avg_sharpe'),
             func.avg(GameSession.vs_benchmark_return).label('avg_excess_return'),
+            func.row_number().over(
+                order_by=(avg_brier.asc(), avg_sharpe.desc())  # Lower Brier is better
+            ).label('rank'),
         )
-        .filter(
+        .where(
             GameSession.username.isnot(None),
             GameSession.completed_at.isnot(None),
         )
         .group_by(GameSession.username)
-        .order_by(
-            func.avg(GameSession.brier_score).asc(),  # Lower Brier is better
-            func.avg(GameSession.portfolio_sharpe).desc(),
-        )
+        .order_by(avg_brier.asc(), avg_sharpe.desc())
     )
+
+
+def _leaderboard_entry(row, recent: Tuple) -> LeaderboardEntry:
+    """Build an entry from an all-time stats row and its last-5 stats."""
+    all_time_brier = round(float(row.avg_brier_score or 0), 4)
+    recent_brier, recent_sharpe, recent_excess = recent
     
-    all_entries = leaderboard_query.all()
-    
-    # Get recent stats for all users in top results
-    usernames_to_fetch = [row.username for row in all_entries[:limit]]
-    if username and username not in usernames_to_fetch:
-        usernames_to_fetch.append(username)
-    recent_stats = get_recent_stats(db, usernames_to_fetch)
-    
-    # Build leaderboard entries
-    entries = []
-    user_rank = None
-    user_stats = None
+    # Calculate trend (only if we have recent stats)
+    trend = None
+    if recent_brier is not None:
+        diff = all_time_brier - recent_brier  # Positive = recent is better (lower Brier)
+        if diff > 0.02:  # Recent is notably better
+            trend = "improving"
+        elif diff < -0.02:  # Recent is notably worse
+            trend = "declining"
+        else:
+            trend = "stable"
     
-    for idx, row in enumerate(all_entries):
-        rank = idx + 1
-        all_time_brier = round(float(row.avg_brier_score or 0), 4)
-        
-        # Get recent stats
-        recent = recent_stats.get(row.username, (None, None, None))
-        recent_brier, recent_sharpe, recent_excess = recent
-        
-        # Calculate trend (only if we have recent stats)
-        trend = None
-        if recent_brier is not None:
-            diff = all_time_brier - recent_brier  # Positive = recent is better (lower Brier)
-            if diff > 0.02:  # Recent is notably better
-                trend = "improving"
-            elif diff < -0.02:  # Recent is notably worse
-                trend = "declining"
-            else:
-                trend = "stable"
-        
-        entry = LeaderboardEntry(
-            rank=rank,
-            username=row.username,
-            games_played=row.games_played,
-            avg_brier_score=all_time_brier,
-            avg_sharpe=round(float(row.avg_sharpe or 0), 4),
-            avg_excess_return=round(float(row.avg_excess_return or 0), 4),
-            recent_brier=recent_brier,
-            recent_sharpe=recent_sharpe,
-            recent_excess=recent_excess,
-            trend=trend,
+    return LeaderboardEntry(
+        rank=row.rank,
+        username=row.username,
+        games_played=row.games_played,
+        avg_brier_score=all_time_brier,
+        avg_sharpe=round(float(row.avg_sharpe or 0), 4),
+        avg_excess_return=round(float(row.avg_excess_return or 0), 4),
+        recent_brier=recent_brier,
+        recent_sharpe=recent_sharpe,
+        recent_excess=recent_excess,
+        trend=trend,
+    )
+
+
+async def invalidate_leaderboard_cache() -> None:
+    """Drop cached boards after a game's scores or username change."""
+    await cache_delete(*LEADERBOARD_CACHE_KEYS)
+
+
+@router.get("/", response_model=LeaderboardOut)
+async def get_leaderboard(
+    limit: int = Query(default=50, ge=1, le=LEADERBOARD_MAX_LIMIT),
+    username: str = Query(default=None, description="Get rank for specific user"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get the leaderboard with top players.
+    Includes all-time stats and last 5 games performance.
+    """
+    # The top-N board is the same for everyone, so it is cached per limit;
+    # the requesting user's own rank is looked up separately
+    cache_key = f"{LEADERBOARD_CACHE_PREFIX}{limit}"
+    cached = await cache_get(cache_key)
+    if cached is not None:
+        if not username:
+            # Already serialized; send as-is
+            return Response(content=cached, media_type="application/json")
+        board = LeaderboardOut.model_validate_json(cached)
+    else:
+        top = (await db.execute(_all_time_stats().limit(limit))).all()
+        recent_stats = await get_recent_stats(db, [row.username for row in top])
+        board = LeaderboardOut(
+            entries=[_leaderboard_entry(row, recent_stats[row.username]) for row in top]
         )
-        
-        if rank <= limit:
-            entries.append(entry)
-        
-        if username and row.username == username:
-            user_rank = rank
-            user_stats = entry
+        board_json = board.model_dump_json()
+        await cache_set(cache_key, board_json, LEADERBOARD_CACHE_TTL_SECONDS)
+        if not username:
+            return Response(content=board_json, media_type="application/json")
     
-    return LeaderboardOut(
-        entries=entries,
-        user_rank=user_rank,
-        user_stats=user_stats,
-    )
+    if username:
+        user_stats = next((e for e in board.entries if e.username == username), None)
+        if user_stats is None:
+            ranked = _all_time_stats().subquery()
+            row = (await db.execute(
+                select(ranked).where(ranked.c.username == username)
+            )).first()
+            if row:
+                recent_stats = await get_recent_stats(db, [username])
+                user_stats = _leaderboard_entry(row, recent_stats[username])
+        if user_stats is not None:
+            board.user_rank = user_stats.rank
+            board.user_stats = user_stats
+    
+    return board
 
 
 @router.get("/stats/{username}")
-def get_user_stats(username: str, db: Session = Depends(get_db)):
+async def get_user_stats(username: str, db: AsyncSession = Depends(get_db)):
     """Get detailed stats for a specific user."""
-    games = (
-        db.query(GameSession)
-        .filter(
+    # Missing scores count as 0 in the averages
+    row = (await db.execute(
+        select(
+            func.count().label('total_games'),
+            func.avg(func.coalesce(GameSession.brier_score, 0)).label('avg_brier'),
+            func.avg(func.coalesce(GameSession.portfolio_sharpe, 0)).label('avg_sharpe'),
+            func.avg(func.coalesce(GameSession.vs_benchmark_return, 0)).label('avg_excess'),
+            func.min(GameSession.brier_score).label('best_brier'),
+            func.max(GameSession.portfolio_sharpe).label('best_sharpe'),
+        )
+        .where(
             GameSession.username == username,
             GameSession.completed_at.isnot(None),
         )
-        .all()
-    )
+    )).one()
     
-    if not games:
+    if not row.total_games:
         return {"message": "No games found for this user"}
     
-    # Calculate stats
-    total_games = len(games)
-    avg_brier = sum(float(g.brier_score or 0) for g in games) / total_games
-    avg_sharpe = sum(float(g.portfolio_sharpe or 0) for g in games) / total_games
-    avg_excess = sum(float(g.vs_benchmark_return or 0) for g in games) / total_games
-    
-    best_brier_game = min(games, key=lambda g: float(g.brier_score or 999))
-    best_sharpe_game = max(games, key=lambda g: float(g.portfolio_sharpe or -999))
-    
     return {
         "username": username,
-        "games_played": total_games,
-        "avg_brier_score": round(avg_brier, 4),
-        "avg_sharpe": round(avg_sharpe, 4),
-        "avg_excess_return": round(avg_excess, 4),
-        "best_brier_score": round(float(best_brier_game.brier_score or 0), 4),
-        "best_sharpe": round(float(best_sharpe_game.portfolio_sharpe or 0), 4),
+        "games_played": row.total_games,
+        "avg_brier_score": round(float(row.avg_brier), 4),
+        "avg_sharpe": round(float(row.avg_sharpe), 4),
+        "avg_excess_return": round(float(row.avg_excess), 4),
+        "best_brier_score": round(float(row.best_brier or 0), 4),
+        "best_sharpe": round(float(row.best_sharpe or 0), 4),
     }
-
-
@@ -1,20 +1,28 @@
 """Scenario API endpoints."""
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from app.database import get_db
-from app.models import Scenario, ScenarioData
+from app.models import Scenario
 from app.schemas import ScenarioBase, ScenarioHistoryOut, ScenarioDataOut
+from app.services.scenario_cache import ScenarioCache, get_scenario_cache
 
 router = APIRouter()
 
+# Validates a whole list of ORM rows in one pydantic-core call
+_SCENARIO_DATA_ADAPTER = TypeAdapter(List[ScenarioDataOut])
+
 
 @router.get("/random", response_model=ScenarioBase)
-def get_random_scenario(db: Session = Depends(get_db)):
+async def get_random_scenario(
+    db: AsyncSession = Depends(get_db),
+    scenarios: ScenarioCache = Depends(get_scenario_cache)
+):
     """Get a random scenario ID for a new game."""
-    scenario = db.query(Scenario).order_by(func.random()).first()
+    scenario = await scenarios.random(db)
     
     if not scenario:
         raise HTTPException(status_code=404, detail="No scenarios available")
@@ -23,38 +31,40 @@ def get_random_scenario(db: Session = Depends(get_db)):
 
 
 @router.get("/{scenario_id}/history", response_model=ScenarioHistoryOut)
-def get_scenario_history(scenario_id: int, db: Session = Depends(get_db)):
+async def get_scenario_history(
+    scenario_id: int,
+    db: AsyncSession = Depends(get_db),
+    scenarios: ScenarioCache = Depends(get_scenario_cache)
+):
     """
     Get the 24-month historical data for a scenario.
     Dates are obscured (Month 1, Month 2, etc).
     """
-    scenario = db.query(Scenario).filter(Scenario.id == scenario_id).first()
+    scenario = await scenarios.get(db, scenario_id)
     
     if not scenario:
         raise HTTPException(status_code=404, detail="Scenario not found")
     
-    # Only return historical data (months 1-24, is_forward=False)
-    historical_data = (
-        db.query(ScenarioData)
-        .filter(
-            ScenarioData.scenario_id == scenario_id,
-            ScenarioData.is_forward == False
+    # Only return historical data (months 1-24, is_forward=False);
+    # both sources are ordered by month_index
+    if scenario.monthly_data_json is not None:
+        historical_data = [d for d in scenario.monthly_data_json if not d['is_forward']]
+    else:
+        historical_data = _SCENARIO_DATA_ADAPTER.validate_python(
+            [d for d in scenario.monthly_data if not d.is_forward], from_attributes=True
         )
-        .order_by(ScenarioData.month_index)
-        .all()
-    )
     
     return ScenarioHistoryOut(
         scenario_id=scenario.id,
         display_label=scenario.display_label,
-        monthly_data=[ScenarioDataOut.model_validate(d) for d in historical_data]
+        monthly_data=historical_data
     )
 
 
 @router.get("/", response_model=List[ScenarioBase])
-def list_scenarios(db: Session = Depends(get_db)):
+async def list_scenarios(db: AsyncSession = Depends(get_db)):
     """List all available scenarios (for debugging/admin)."""
-    scenarios = db.query(Scenario).all()
-    return scenarios
+    # Only the ScenarioBase columns, as plain rows
+    return (await db.execute(select(Scenario.id, Scenario.display_label))).all()
 
 
@@ -0,0 +1,43 @@
+"""Redis-backed cache helpers.
+
+The cache is an optimization only: if Redis is unreachable every helper
+behaves like a miss so requests fall through to the database.
+"""
+from typing import Optional
+
+import redis
+import redis.asyncio
+
+from app.config import get_settings
+
+settings = get_settings()
+
+redis_client = redis.asyncio.Redis.from_url(
+    settings.redis_url,
+    socket_timeout=0.25,
+    socket_connect_timeout=0.25,
+)
+
+
+async def cache_get(key: str) -> Optional[bytes]:
+    """Get a cached value, or None on miss or Redis error."""
+    try:
+        return await redis_client.get(key)
+    except redis.RedisError:
+        return None
+
+
+async def cache_set(key: str, value: str, ttl_seconds: int) -> None:
+    """Cache a value with a TTL, ignoring Redis errors."""
+    try:
+        await redis_client.setex(key, ttl_seconds, value)
+    except redis.RedisError:
+        pass
+
+
+async def cache_delete(*keys: str) -> None:
+    """Drop cached values, ignoring Redis errors."""
+    try:
+        await redis_client.delete(*keys)
+    except redis.RedisError:
+        pass
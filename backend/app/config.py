@@ -36,6 +36,10 @@ class Settings(BaseSettings):
     benchmark_cash: int = 0
     benchmark_gold: int = 0
     
+    # Leaderboard last-5-games query: "window" (row_number) or "lateral"
+    # (per-user LIMIT 5); lateral wins once users have many games each
+    leaderboard_recent_stats_query: str = "window"
+    
     # Validation config
     min_rationale_chars: int = 50
     max_rationale_chars: int = 500
@@ -45,9 +49,11 @@ class Settings(BaseSettings):
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
+        # One snapshot per process; values are read once at import
+        frozen = True
 
 
-@lru_cache()
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
     return Settings()
 
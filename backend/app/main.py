@@ -1,42 +1,59 @@
 """Hindsight Economics - FastAPI Application."""
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 
 from app.api import api_router
 from app.config import get_settings
+from app.database import AsyncSessionLocal, async_engine
+from app.middleware import ASGICORS
+from app.services import ScenarioCache
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Scenarios are immutable between pipeline runs; keep them in memory,
+    # reloading now and then so every worker sees new runs
+    app.state.scenarios = ScenarioCache()
+    async with AsyncSessionLocal() as db:
+        await app.state.scenarios.load(db)
+    reload_task = asyncio.create_task(app.state.scenarios.reload_periodically(AsyncSessionLocal))
+    yield
+    reload_task.cancel()
+    await async_engine.dispose()
+
 app = FastAPI(
     title="Hindsight Economics",
     description="A forecasting prediction game that tests users' economic intuition",
     version="1.0.0",
     # Disable automatic redirect from /path to /path/ to prevent HTTP redirect issues
     redirect_slashes=False,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
-# CORS middleware for frontend
-allowed_origins = [
+# CORS middleware for frontend, plus production frontend URLs if configured
+allowed_origins = frozenset(filter(None, [
     "http://localhost:3000",  # Next.js dev server
     "http://127.0.0.1:3000",
-]
-
-# Add production frontend URLs if configured
-if settings.frontend_url and settings.frontend_url not in allowed_origins:
-    allowed_origins.append(settings.frontend_url)
-if settings.app_base_url and settings.app_base_url not in allowed_origins:
-    allowed_origins.append(settings.app_base_url)
+    settings.frontend_url,
+    settings.app_base_url,
+]))
 
-# Log allowed origins for debugging
-print(f"CORS allowed origins: {allowed_origins}")
+# Reveal responses carry 36 months of chart data; smaller ones aren't
+# worth the CPU. Added first so CORS stays outermost and answers
+# preflights without going through it.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=allowed_origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    ASGICORS,
+    allow_origins=frozenset(origin.encode() for origin in allowed_origins),
 )
 
 # Include API routes
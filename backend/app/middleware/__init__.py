@@ -0,0 +1,3 @@
+from app.middleware.cors import ASGICORS
+
+__all__ = ["ASGICORS"]
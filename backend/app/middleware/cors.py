@@ -0,0 +1,87 @@
+"""Minimal pure-ASGI CORS middleware for a fixed set of credentialed origins."""
+from typing import FrozenSet, List, Tuple
+
+ALLOW_METHODS = b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"
+PREFLIGHT_MAX_AGE = b"600"
+
+
+class ASGICORS:
+    """
+    Allow credentialed cross-origin requests from allow_origins.
+    
+    Equivalent to Starlette's CORSMiddleware with allow_credentials=True
+    and any method/header, but works directly on the raw ASGI messages:
+    origins are compared as bytes and no Request/Headers objects are built.
+    """
+    
+    def __init__(self, app, allow_origins: FrozenSet[bytes]):
+        self.app = app
+        self.allow_origins = allow_origins
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        origin = None
+        request_method = None
+        request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+        
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+        
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            await self._preflight(origin, request_headers, send)
+            return
+        
+        if origin not in self.allow_origins:
+            await self.app(scope, receive, send)
+            return
+        
+        cors_headers = _cors_headers(origin)
+        
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + cors_headers
+            await send(message)
+        
+        await self.app(scope, receive, send_with_cors)
+    
+    async def _preflight(self, origin: bytes, request_headers, send) -> None:
+        if origin not in self.allow_origins:
+            body = b"Disallowed CORS origin"
+            await send({
+                "type": "http.response.start",
+                "status": 400,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+        
+        headers = _cors_headers(origin) + [
+            (b"access-control-allow-methods", ALLOW_METHODS),
+            (b"access-control-max-age", PREFLIGHT_MAX_AGE),
+        ]
+        if request_headers is not None:
+            headers.append((b"access-control-allow-headers", request_headers))
+        await send({"type": "http.response.start", "status": 204, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
+
+
+def _cors_headers(origin: bytes) -> List[Tuple[bytes, bytes]]:
+    return [
+        (b"access-control-allow-origin", origin),
+        (b"access-control-allow-credentials", b"true"),
+        (b"vary", b"Origin"),
+    ]
@@ -1,7 +1,7 @@
 from app.models.scenario import Scenario, ScenarioData
 from app.models.game_session import GameSession
-from app.models.user import User, MagicLinkAttempt
+from app.models.user import User, MagicLinkAttempt, MagicLinkCounter
 
-__all__ = ["Scenario", "ScenarioData", "GameSession", "User", "MagicLinkAttempt"]
+__all__ = ["Scenario", "ScenarioData", "GameSession", "User", "MagicLinkAttempt", "MagicLinkCounter"]
 
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, Text, ForeignKey, DateTime, CheckConstraint
+from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, DateTime, CheckConstraint, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -8,17 +8,17 @@ class GameSession(Base):
     """User game sessions with predictions, allocations, and scores."""
     __tablename__ = "game_sessions"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     scenario_id = Column(Integer, ForeignKey("scenarios.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)  # Optional, linked when authenticated
     session_token = Column(String(64), unique=True, index=True, nullable=False)
     username = Column(String(50), index=True)  # Optional, for leaderboard
     
     # Market predictions (confidence 0.50 - 1.00, stored as probability of "Yes")
-    pred_above_15pct = Column(Numeric(4, 3))
-    pred_above_10pct = Column(Numeric(4, 3))
-    pred_above_5pct = Column(Numeric(4, 3))
-    pred_above_0pct = Column(Numeric(4, 3))
+    pred_above_15pct = Column(Float)
+    pred_above_10pct = Column(Float)
+    pred_above_5pct = Column(Float)
+    pred_above_0pct = Column(Float)
     
     # Asset allocation (must sum to 100)
     alloc_stocks = Column(Integer)
@@ -30,11 +30,11 @@ class GameSession(Base):
     rationale = Column(Text)
     
     # Computed scores (filled after reveal)
-    brier_score = Column(Numeric(6, 4))
-    portfolio_return = Column(Numeric(8, 4))
-    portfolio_sharpe = Column(Numeric(6, 4))
-    vs_benchmark_return = Column(Numeric(8, 4))  # portfolio return - benchmark return
-    vs_benchmark_sharpe = Column(Numeric(6, 4))
+    brier_score = Column(Float)
+    portfolio_return = Column(Float)
+    portfolio_sharpe = Column(Float)
+    vs_benchmark_return = Column(Float)  # portfolio return - benchmark return
+    vs_benchmark_sharpe = Column(Float)
     
     # Optional reflection after reveal
     reflection = Column(Text)
@@ -46,11 +46,28 @@ class GameSession(Base):
     scenario = relationship("Scenario", back_populates="game_sessions")
     user = relationship("User", back_populates="game_sessions")
     
+    # Fetch server defaults (created_at) via INSERT ... RETURNING
+    __mapper_args__ = {"eager_defaults": True}
+    
     __table_args__ = (
         CheckConstraint('alloc_stocks >= 0 AND alloc_stocks <= 100', name='check_alloc_stocks'),
         CheckConstraint('alloc_bonds >= 0 AND alloc_bonds <= 100', name='check_alloc_bonds'),
         CheckConstraint('alloc_cash >= 0 AND alloc_cash <= 100', name='check_alloc_cash'),
         CheckConstraint('alloc_gold >= 0 AND alloc_gold <= 100', name='check_alloc_gold'),
+        CheckConstraint(
+            'COALESCE(alloc_stocks, 0) + COALESCE(alloc_bonds, 0) '
+            '+ COALESCE(alloc_cash, 0) + COALESCE(alloc_gold, 0) = 100',
+            name='chk_alloc_sum',
+        ),
+        # Leaderboard aggregates and per-user recent/all-time stats; the
+        # included scores let them run as index-only scans
+        Index(
+            'ix_gs_leaderboard_scores',
+            username,
+            completed_at.desc(),
+            postgresql_where=text('username IS NOT NULL AND completed_at IS NOT NULL'),
+            postgresql_include=['brier_score', 'portfolio_sharpe', 'vs_benchmark_return'],
+        ),
     )
 
 
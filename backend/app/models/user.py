@@ -1,7 +1,8 @@
 """User model for authentication."""
-from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, Boolean, LargeBinary, Index, text
+from sqlalchemy.dialects.postgresql import CITEXT
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from app.database import Base
 
@@ -10,39 +11,77 @@ class User(Base):
     """User model for magic link authentication."""
     __tablename__ = "users"
     
-    id = Column(Integer, primary_key=True, index=True)
-    email = Column(String(255), unique=True, index=True, nullable=False)
+    id = Column(Integer, primary_key=True)
+    email = Column(CITEXT, unique=True, index=True, nullable=False)  # Case-insensitive
     username = Column(String(50), unique=True, index=True, nullable=True)
     
-    # Auth tokens
-    magic_link_token = Column(String(255), nullable=True)
-    magic_link_expires = Column(DateTime, nullable=True)
+    # Auth tokens (only the SHA-256 digest is stored)
+    magic_link_token_hash = Column(LargeBinary(32), nullable=True)
+    magic_link_expires = Column(DateTime(timezone=True), nullable=True)
+    
+    # Session management (only the SHA-256 digest is stored)
+    session_token_hash = Column(LargeBinary(32), nullable=True)
+    session_expires = Column(DateTime(timezone=True), nullable=True)
     
-    # Session management
-    session_token = Column(String(255), nullable=True, index=True)
-    session_expires = Column(DateTime, nullable=True)
+    # Legacy plaintext tokens, no longer written; drop once rolled out
+    magic_link_token = Column(String(255), nullable=True)
+    session_token = Column(String(255), nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    last_login = Column(DateTime, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_login = Column(DateTime(timezone=True), nullable=True)
     
     # Stats (cached for quick access)
     games_played = Column(Integer, default=0)
-    avg_brier_score = Column(Integer, nullable=True)  # Stored as int * 10000 for precision
-    avg_portfolio_return = Column(Integer, nullable=True)  # Stored as int * 10000
+    avg_brier_score = Column(Numeric(6, 4), nullable=True)
+    avg_portfolio_return = Column(Numeric(8, 4), nullable=True)
     wins_vs_benchmark = Column(Integer, default=0)
     losses_vs_benchmark = Column(Integer, default=0)
     
     # Relationships
     game_sessions = relationship("GameSession", back_populates="user")
+    
+    __table_args__ = (
+        # Session lookup on every authenticated request; INCLUDE makes it index-only
+        Index(
+            'ix_users_active_session_hash',
+            'session_token_hash',
+            unique=True,
+            postgresql_where=text('session_token_hash IS NOT NULL'),
+            postgresql_include=['id', 'username', 'email', 'session_expires'],
+        ),
+        # Equality-only lookup of a random digest: a hash index is smaller
+        # than a btree. The session index stays btree, since hash indexes
+        # can't be unique or INCLUDE columns.
+        Index(
+            'ix_users_magic_link_hash',
+            'magic_link_token_hash',
+            postgresql_using='hash',
+            postgresql_where=text('magic_link_token_hash IS NOT NULL'),
+        ),
+    )
 
 
 class MagicLinkAttempt(Base):
     """Track magic link attempts for rate limiting."""
     __tablename__ = "magic_link_attempts"
     
-    id = Column(Integer, primary_key=True, index=True)
-    email = Column(String(255), index=True, nullable=False)
-    attempted_at = Column(DateTime, default=datetime.utcnow)
+    id = Column(Integer, primary_key=True)
+    email = Column(CITEXT, nullable=False)
+    attempted_at = Column(DateTime(timezone=True), server_default=func.now())
     ip_address = Column(String(50), nullable=True)
+    
+    __table_args__ = (
+        # Covers per-email lookups too (leading column)
+        Index('ix_mla_email_attempted', email, attempted_at.desc()),
+    )
+
 
+
+class MagicLinkCounter(Base):
+    """Per-email counter for the magic link rate-limit window."""
+    __tablename__ = "magic_link_counters"
+    
+    email = Column(CITEXT, primary_key=True)
+    window_start = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    attempts = Column(Integer, nullable=False, default=1)
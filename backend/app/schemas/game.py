@@ -13,7 +13,8 @@ class PredictionsInput(BaseModel):
     @model_validator(mode='after')
     def validate_monotonic(self):
         """Higher thresholds should have lower or equal probabilities."""
-        if not (self.above_15pct <= self.above_10pct <= self.above_5pct <= self.above_0pct):
+        p15, p10, p5, p0 = self.above_15pct, self.above_10pct, self.above_5pct, self.above_0pct
+        if p15 > p10 or p10 > p5 or p5 > p0:
             raise ValueError(
                 "Predictions must be monotonically increasing: "
                 "P(>15%) <= P(>10%) <= P(>5%) <= P(>0%)"
@@ -1,5 +1,7 @@
 from app.services.scoring import ScoringService
+from app.services.email import send_magic_link_email
+from app.services.scenario_cache import ScenarioCache, get_scenario_cache
 
-__all__ = ["ScoringService"]
+__all__ = ["ScoringService", "send_magic_link_email", "ScenarioCache", "get_scenario_cache"]
 
 
@@ -0,0 +1,70 @@
+"""Email delivery through the Resend HTTP API."""
+import hashlib
+from string import Template
+
+import httpx
+
+from app.config import get_settings
+
+settings = get_settings()
+
+RESEND_API_URL = "https://api.resend.com/emails"
+MAGIC_LINK_SENDER = "Hindsight Economics <noreply@notifications.diftar.co>"
+
+# Built once at import; the expiry is fixed per process, so only the URL is
+# substituted per send
+_MAGIC_LINK_HTML = Template(Template("""
+    <div style="font-family: sans-serif; max-width: 600px; margin: 0 auto;">
+        <h1 style="color: #3b82f6;">Hindsight Economics</h1>
+        <p>Click the link below to log in:</p>
+        <p>
+            <a href="$url"
+               style="display: inline-block; background: #3b82f6; color: white;
+                      padding: 12px 24px; text-decoration: none; border-radius: 8px;">
+                Log In
+            </a>
+        </p>
+        <p style="color: #666; font-size: 14px;">
+            This link expires in $minutes minutes.
+        </p>
+        <p style="color: #666; font-size: 14px;">
+            If you didn't request this, you can safely ignore this email.
+        </p>
+    </div>
+""").safe_substitute(minutes=settings.magic_link_expires_minutes))
+
+# Shared client: pooled keep-alive connections and HTTP/2, so sends don't
+# pay a TLS handshake each time
+_client = httpx.AsyncClient(http2=True, timeout=10.0)
+
+
+async def send_magic_link_email(email: str, magic_link_url: str) -> None:
+    """
+    Send the login email. Runs as a background task after the response.
+
+    The Idempotency-Key lets Resend drop duplicate sends of the same link
+    if the request is retried.
+    """
+    idempotency_key = hashlib.sha256(f"{email}|{magic_link_url}".encode()).hexdigest()
+
+    try:
+        response = await _client.post(
+            RESEND_API_URL,
+            headers={
+                "Authorization": f"Bearer {settings.resend_api_key}",
+                "Idempotency-Key": idempotency_key,
+            },
+            json={
+                "from": MAGIC_LINK_SENDER,
+                "to": [email],
+                "subject": "Your login link for Hindsight Economics",
+                "html": _MAGIC_LINK_HTML.substitute(url=magic_link_url),
+            },
+        )
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        # Log the magic link so you can still use it (helpful for testing with Resend free tier)
+        print(f"[EMAIL FAILED] Magic link for {email}: {magic_link_url}")
+        print(f"[EMAIL ERROR] {e}")
+        # NOTE: On Resend's free tier, you can only send to the email you registered with.
+        # To send to other emails: 1) Verify your own domain in Resend, or 2) Add emails to Resend Audience
@@ -0,0 +1,125 @@
+"""In-process cache of scenarios and their monthly data."""
+import asyncio
+import random
+from typing import Callable, Dict, List, Optional
+
+from fastapi import Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload, selectinload
+
+from app.models import Scenario
+
+# How often the cache is rebuilt, so each worker picks up pipeline runs
+RELOAD_INTERVAL_SECONDS = 300
+
+
+class ScenarioCache:
+    """
+    Scenarios with their monthly data, keyed by id.
+    
+    Scenarios are fixed historical data written only by the pipeline
+    scripts, so they are loaded at startup and reloaded periodically. A
+    miss (e.g. a scenario computed since) falls back to the database and
+    is kept; an id the database no longer has (e.g. after a --clear run)
+    is dropped. Cached objects are detached and fully loaded; treat them
+    as read-only.
+    
+    optimal_metrics holds values derived from a scenario, keyed by its id;
+    it is cleared with the scenarios so it can't outlive them.
+    """
+    
+    def __init__(self):
+        self._scenarios: Dict[int, Scenario] = {}
+        self._ids: List[int] = []
+        self.optimal_metrics: Dict[int, dict] = {}
+    
+    @staticmethod
+    def _query():
+        # Monthly data in one batched SELECT ... IN; game_sessions must never
+        # be lazy-loaded onto a cached scenario
+        return select(Scenario).options(
+            selectinload(Scenario.monthly_data),
+            raiseload('*'),
+        )
+    
+    @staticmethod
+    async def _exists(db: AsyncSession, scenario_id: int) -> bool:
+        # Primary key lookup, answered from the index
+        return await db.scalar(select(Scenario.id).where(Scenario.id == scenario_id)) is not None
+    
+    def _discard(self, scenario_id: int) -> None:
+        self._scenarios.pop(scenario_id, None)
+        # Every copy, whether or not the dict still had it
+        self._ids = [i for i in self._ids if i != scenario_id]
+        self.optimal_metrics.pop(scenario_id, None)
+    
+    async def load(self, db: AsyncSession) -> None:
+        """(Re)load every scenario, e.g. after the pipeline has run."""
+        scenarios = (await db.execute(self._query())).scalars().all()
+        self._scenarios = {s.id: s for s in scenarios}
+        self._ids = list(self._scenarios)
+        self.optimal_metrics = {}
+    
+    async def reload_periodically(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        interval: float = RELOAD_INTERVAL_SECONDS,
+    ) -> None:
+        """Reload every interval seconds until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with session_factory() as db:
+                    await self.load(db)
+            except Exception as e:
+                # Keep serving the current scenarios; try again next time
+                print(f"[SCENARIOS] Reload failed: {e}")
+    
+    async def get(
+        self,
+        db: AsyncSession,
+        scenario_id: int,
+        check_exists: bool = True,
+    ) -> Optional[Scenario]:
+        """
+        Scenario with monthly_data loaded, or None if it doesn't exist.
+        
+        A cached scenario is confirmed to still be in the database unless
+        check_exists is False, e.g. when a foreign key already guarantees it.
+        """
+        scenario = self._scenarios.get(scenario_id)
+        if scenario is None:
+            scenario = (await db.execute(
+                self._query().where(Scenario.id == scenario_id)
+            )).scalar_one_or_none()
+            # A concurrent miss for the same id may have added it meanwhile
+            if scenario is not None and scenario_id not in self._scenarios:
+                self._scenarios[scenario_id] = scenario
+                self._ids.append(scenario_id)
+        elif check_exists and not await self._exists(db, scenario_id):
+            self._discard(scenario_id)
+            return None
+        return scenario
+    
+    async def random(self, db: AsyncSession) -> Optional[Scenario]:
+        """A uniformly random scenario, or None if there are none."""
+        if not self._ids:
+            # Nothing was there at startup; the pipeline may have run since
+            await self.load(db)
+        while self._ids:
+            scenario_id = random.choice(self._ids)
+            scenario = self._scenarios.get(scenario_id)
+            if scenario is not None and await self._exists(db, scenario_id):
+                return scenario
+            # Out of sync with _ids, or deleted since it was cached
+            self._discard(scenario_id)
+        return None
+    
+    def all(self) -> List[Scenario]:
+        return list(self._scenarios.values())
+
+
+def get_scenario_cache(request: Request) -> ScenarioCache:
+    """Dependency for the app-wide scenario cache."""
+    return request.app.state.scenarios
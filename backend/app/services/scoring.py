@@ -1,7 +1,131 @@
 """Scoring service for Brier scores and portfolio metrics."""
 from typing import Dict, List, Tuple
+import bisect
 import math
 
+import numpy as np
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:  # numba is optional; NumPy versions are used instead
+    HAS_NUMBA = False
+    
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+
+ASSET_ORDER = ('stocks', 'bonds', 'cash', 'gold')
+
+
+def pack(values: Dict[str, float]) -> np.ndarray:
+    """Per-asset values as a float64[4] array in ASSET_ORDER."""
+    return np.fromiter((values[asset] for asset in ASSET_ORDER), dtype=np.float64, count=len(ASSET_ORDER))
+
+
+def _weights(allocation: Dict[str, int]) -> np.ndarray:
+    """Allocation percentages as fractional weights in ASSET_ORDER."""
+    return pack(allocation) / 100.0
+
+
+def _monthly_matrix(monthly_returns: Dict[str, List[float]]) -> np.ndarray:
+    """Assets x 12 months of returns, rows in ASSET_ORDER."""
+    return np.array([monthly_returns[asset][:12] for asset in ASSET_ORDER], dtype=np.float64)
+
+
+# Compiled at import against the given signature; cache=True keeps the
+# machine code on disk (NUMBA_CACHE_DIR) so workers don't recompile it
+@njit("float64(float64[:, :], float64[:], float64)", cache=True, fastmath=True)
+def _sharpe_kernel(monthly_returns, weights, risk_free_return):
+    """Annualized Sharpe of a weighted portfolio; monthly_returns is assets x months."""
+    n_assets, n_months = monthly_returns.shape
+    portfolio = np.zeros(n_months)
+    for i in range(n_months):
+        for a in range(n_assets):
+            portfolio[i] += weights[a] * monthly_returns[a, i]
+    
+    cumulative = 1.0
+    total = 0.0
+    for i in range(n_months):
+        cumulative *= 1.0 + portfolio[i]
+        total += portfolio[i]
+    mean_monthly = total / n_months
+    
+    variance = 0.0
+    for i in range(n_months):
+        variance += (portfolio[i] - mean_monthly) ** 2
+    variance /= n_months
+    annualized_std = math.sqrt(variance) * math.sqrt(12.0)
+    
+    if annualized_std == 0.0:
+        return 0.0
+    return (cumulative - 1.0 - risk_free_return) / annualized_std
+
+
+def _sharpe_numpy(monthly_returns, weights, risk_free_return):
+    """Same as _sharpe_kernel, vectorized for when numba isn't installed."""
+    portfolio = weights @ monthly_returns
+    annualized_std = portfolio.std() * math.sqrt(12)
+    if annualized_std == 0:
+        return 0.0
+    return (np.prod(1.0 + portfolio) - 1.0 - risk_free_return) / annualized_std
+
+
+_sharpe = _sharpe_kernel if HAS_NUMBA else _sharpe_numpy
+
+
+# (prediction key, return threshold, display label)
+BRIER_THRESHOLDS = (
+    ('above_15pct', 0.15, '>15%'),
+    ('above_10pct', 0.10, '>10%'),
+    ('above_5pct', 0.05, '>5%'),
+    ('above_0pct', 0.00, '>0%'),
+)
+_THRESHOLD_VALUES = np.array([threshold for _, threshold, _ in BRIER_THRESHOLDS])
+
+
+@njit(cache=True, fastmath=True)
+def _brier_kernel(probabilities, thresholds, actual_return):
+    """Mean Brier score and the per-threshold squared errors."""
+    n = probabilities.shape[0]
+    contributions = np.empty(n)
+    total = 0.0
+    for i in range(n):
+        outcome = 1.0 if actual_return > thresholds[i] else 0.0
+        contributions[i] = (probabilities[i] - outcome) ** 2
+        total += contributions[i]
+    return total / n, contributions
+
+
+def _brier_numpy(probabilities, thresholds, actual_return):
+    """Same as _brier_kernel, vectorized for when numba isn't installed."""
+    outcomes = (actual_return > thresholds).astype(np.float64)
+    diffs = probabilities - outcomes
+    contributions = diffs * diffs
+    return contributions.mean(), contributions
+
+
+if HAS_NUMBA:
+    _brier = _brier_kernel
+    # Compile (or load from the on-disk cache) now rather than on the
+    # first reveal
+    _brier(np.zeros(len(BRIER_THRESHOLDS)), _THRESHOLD_VALUES, 0.0)
+else:
+    _brier = _brier_numpy
+
+
+# Upper bound (exclusive) of each Brier interpretation band
+_BRIER_CUTS = (0.10, 0.15, 0.20, 0.25)
+_BRIER_LABELS = (
+    "Excellent calibration",
+    "Good calibration",
+    "Decent calibration",
+    "Poor calibration (near random)",
+    "Worse than random guessing",
+)
+
 
 class ScoringService:
     """Calculate game scores including Brier score and portfolio metrics."""
@@ -24,24 +148,21 @@ class ScoringService:
             - brier_score: Average squared error (lower is better)
             - prediction_results: List of dicts with details for each prediction
         """
-        thresholds = [
-            ('above_15pct', 0.15, '>15%'),
-            ('above_10pct', 0.10, '>10%'),
-            ('above_5pct', 0.05, '>5%'),
-            ('above_0pct', 0.00, '>0%'),
-        ]
+        probabilities = np.fromiter(
+            (predictions[key] for key, _, _ in BRIER_THRESHOLDS),
+            dtype=np.float64,
+            count=len(BRIER_THRESHOLDS),
+        )
+        brier_score, contributions = _brier(
+            probabilities, _THRESHOLD_VALUES, float(actual_return)
+        )
         
         results = []
-        total_brier = 0.0
-        
-        for key, threshold, display in thresholds:
+        for (key, threshold, display), brier_contribution in zip(
+            BRIER_THRESHOLDS, contributions.tolist()
+        ):
             prob_yes = predictions[key]
             actual_outcome = actual_return > threshold
-            outcome_value = 1.0 if actual_outcome else 0.0
-            
-            # Brier score contribution: (probability - outcome)^2
-            brier_contribution = (prob_yes - outcome_value) ** 2
-            total_brier += brier_contribution
             
             # Determine user's prediction and confidence
             if prob_yes >= 0.5:
@@ -62,8 +183,7 @@ class ScoringService:
                 'brier_contribution': round(brier_contribution, 4),
             })
         
-        brier_score = total_brier / len(thresholds)
-        return round(brier_score, 4), results
+        return round(float(brier_score), 4), results
     
     @staticmethod
     def calculate_portfolio_return(
@@ -80,12 +200,7 @@ class ScoringService:
         Returns:
             Portfolio return as decimal (e.g., 0.08 for 8%)
         """
-        portfolio_return = 0.0
-        for asset in ['stocks', 'bonds', 'cash', 'gold']:
-            weight = allocation[asset] / 100.0
-            portfolio_return += weight * returns[asset]
-        
-        return round(portfolio_return, 4)
+        return round(float(_weights(allocation) @ pack(returns)), 4)
     
     @staticmethod
     def calculate_portfolio_sharpe(
@@ -104,33 +219,9 @@ class ScoringService:
         Returns:
             Sharpe ratio
         """
-        # Calculate monthly portfolio returns
-        portfolio_monthly = []
-        for i in range(12):
-            monthly_return = 0.0
-            for asset in ['stocks', 'bonds', 'cash', 'gold']:
-                weight = allocation[asset] / 100.0
-                monthly_return += weight * monthly_returns[asset][i]
-            portfolio_monthly.append(monthly_return)
-        
-        # Calculate annualized return
-        cumulative = 1.0
-        for r in portfolio_monthly:
-            cumulative *= (1 + r)
-        annualized_return = cumulative - 1
-        
-        # Calculate annualized volatility
-        mean_monthly = sum(portfolio_monthly) / len(portfolio_monthly)
-        variance = sum((r - mean_monthly) ** 2 for r in portfolio_monthly) / len(portfolio_monthly)
-        monthly_std = math.sqrt(variance)
-        annualized_std = monthly_std * math.sqrt(12)
-        
-        # Sharpe ratio
-        if annualized_std == 0:
-            return 0.0
-        
-        sharpe = (annualized_return - risk_free_return) / annualized_std
-        return round(sharpe, 4)
+        return round(float(_sharpe(
+            _monthly_matrix(monthly_returns), _weights(allocation), float(risk_free_return)
+        )), 4)
     
     @staticmethod
     def calculate_benchmark_metrics(
@@ -169,16 +260,7 @@ class ScoringService:
     @staticmethod
     def get_brier_interpretation(score: float) -> str:
         """Return interpretation of Brier score."""
-        if score < 0.10:
-            return "Excellent calibration"
-        elif score < 0.15:
-            return "Good calibration"
-        elif score < 0.20:
-            return "Decent calibration"
-        elif score < 0.25:
-            return "Poor calibration (near random)"
-        else:
-            return "Worse than random guessing"
+        return _BRIER_LABELS[bisect.bisect_right(_BRIER_CUTS, score)]
     
     @staticmethod
     def calculate_optimal_allocation(returns: Dict[str, float]) -> Dict[str, int]:
@@ -192,15 +274,10 @@ class ScoringService:
         Returns:
             Dict with optimal allocation (100% in best asset, 0% elsewhere)
         """
-        # Find the best performing asset
-        best_asset = max(returns, key=returns.get)
+        # Find the best performing asset (first in ASSET_ORDER on ties)
+        best = int(np.argmax(pack(returns)))
         
-        return {
-            'stocks': 100 if best_asset == 'stocks' else 0,
-            'bonds': 100 if best_asset == 'bonds' else 0,
-            'cash': 100 if best_asset == 'cash' else 0,
-            'gold': 100 if best_asset == 'gold' else 0,
-        }
+        return {asset: 100 if i == best else 0 for i, asset in enumerate(ASSET_ORDER)}
     
     @staticmethod
     def calculate_optimal_metrics(
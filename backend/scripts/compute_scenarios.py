@@ -17,16 +17,18 @@ import json
 import math
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import List, Optional
+from functools import lru_cache
+from typing import List, Optional, Tuple
 
 import pandas as pd
 import numpy as np
+import pyarrow.parquet as pq
 
 # Add parent to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from sqlalchemy.orm import Session
-from app.database import engine, SessionLocal
+from sqlalchemy import delete, func, insert, select, text
+from app.database import engine
 from app.models import Scenario, ScenarioData
 from app.database import Base
 
@@ -83,13 +85,58 @@ HISTORICAL_CONTEXT = {
 }
 
 
-def load_normalized_data() -> pd.DataFrame:
-    """Load normalized data from parquet."""
+ASSETS = ('stocks', 'bonds', 'cash', 'gold')
+REAL_INDEX_COLUMNS = ['idx_stocks_real', 'idx_bonds_real', 'idx_cash_real', 'idx_gold_real']
+BENCHMARK_WEIGHTS = np.array([0.6, 0.4, 0.0, 0.0])  # 60/40, in ASSETS order
+
+
+MACRO_COLUMNS = [
+    'gdp_growth_yoy', 'unemployment_rate', 'inflation_rate_yoy', 'fed_funds_rate', 'industrial_prod_yoy',
+]
+# Everything scenario generation reads from the normalized data (real
+# indices first, so they are the leading columns of a converted window)
+SCENARIO_COLUMNS = REAL_INDEX_COLUMNS + MACRO_COLUMNS
+
+
+@lru_cache(maxsize=4)
+def _read_parquet(
+    path: Path,
+    columns: Optional[Tuple[str, ...]],
+    start: Optional[pd.Timestamp],
+    end: Optional[pd.Timestamp],
+) -> pd.DataFrame:
+    columns = list(columns) if columns else None
+    if "date" not in pq.read_schema(path).names:
+        # Written before normalize_data named the index, so there is no
+        # column to push the bounds down to; slice after reading instead
+        df = pd.read_parquet(path, columns=columns, engine="pyarrow")
+        return df.loc[start:end]
+    
+    filters = []
+    if start is not None:
+        filters.append(("date", ">=", start))
+    if end is not None:
+        filters.append(("date", "<=", end))
+    return pd.read_parquet(path, columns=columns, filters=filters or None, engine="pyarrow")
+
+
+def load_normalized_data(
+    columns: Optional[List[str]] = None,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+) -> pd.DataFrame:
+    """
+    Load normalized data from parquet, optionally only some columns and dates.
+    
+    The date bounds are inclusive and pushed down to pyarrow, so row groups
+    outside them are skipped using the footer statistics. Reads are cached
+    per process; treat the returned frame as read-only.
+    """
     path = DATA_DIR / "normalized_data.parquet"
     if not path.exists():
         raise FileNotFoundError(f"Normalized data not found at {path}. Run normalize_data.py first.")
     
-    return pd.read_parquet(path)
+    return _read_parquet(path, tuple(columns) if columns else None, start, end)
 
 
 def extract_scenario_window(
@@ -105,13 +152,18 @@ def extract_scenario_window(
     (forward_months) after start_date, for a total of (lookback + forward) months.
     
     Note: start_date refers to month 24 (end of lookback period).
+    
+    The window is a view of df, not a copy; callers only read it.
     """
     # Calculate window bounds
     window_start = start_date - pd.DateOffset(months=lookback_months)
     window_end = start_date + pd.DateOffset(months=forward_months - 1)
     
-    # Extract window
-    window = df[(df.index >= window_start) & (df.index <= window_end)].copy()
+    # Extract window; the index is sorted by month, so binary-search the
+    # bounds rather than scanning the whole index with a boolean mask
+    lo = df.index.searchsorted(window_start)
+    hi = df.index.searchsorted(window_end, side='right')
+    window = df.iloc[lo:hi]
     
     # Verify we have enough data
     expected_months = lookback_months + forward_months
@@ -122,12 +174,93 @@ def extract_scenario_window(
     return window
 
 
-def index_to_100(series: pd.Series) -> pd.Series:
-    """Re-index a series to start at 100."""
-    first_value = series.iloc[0]
-    if first_value == 0 or pd.isna(first_value):
-        return series
-    return series / first_value * 100
+def index_to_100(matrix: np.ndarray) -> np.ndarray:
+    """Re-index each column to start at 100 (left as is if it starts at 0 or NaN)."""
+    first = matrix[0]
+    scale = np.where((first == 0) | np.isnan(first), 1.0, 100.0 / np.where(first == 0, 1.0, first))
+    return matrix * scale
+
+
+def _annualized_volatility(monthly: np.ndarray) -> np.ndarray:
+    """
+    Annualized volatility along axis 1, ignoring NaN months.
+    
+    Population std as np.std; 0 where fewer than two months are present.
+    """
+    present = ~np.isnan(monthly)
+    n = present.sum(axis=1)
+    denom = np.maximum(n, 1)
+    mean = np.where(present, monthly, 0.0).sum(axis=1) / denom
+    deviations = np.where(present, monthly - mean[:, None], 0.0)
+    std = np.sqrt((deviations * deviations).sum(axis=1) / denom)
+    return np.where(n >= 2, std * math.sqrt(12), 0.0)
+
+
+def _forward_metrics(block: np.ndarray, lookback_months: int) -> List[dict]:
+    """Forward metrics for a (scenarios, months, 4) block of real indices."""
+    # 12-month forward returns (real), from the end of the lookback period
+    start = block[:, lookback_months - 1]
+    valid = (start != 0) & ~np.isnan(start)
+    fwd = np.where(valid, block[:, -1] / np.where(valid, start, 1.0) - 1, 0.0)
+    
+    # Monthly returns over the forward period, for volatility
+    base = block[:, lookback_months - 1:]
+    monthly = np.diff(base, axis=1) / base[:, :-1]
+    volatility = _annualized_volatility(monthly)
+    
+    # Benchmark (60/40) metrics; a gap in a zero-weight asset mustn't turn
+    # the blend into NaN
+    benchmark_return = fwd @ BENCHMARK_WEIGHTS
+    benchmark_vol = _annualized_volatility(np.nan_to_num(monthly) @ BENCHMARK_WEIGHTS)
+    risk_free = fwd[:, ASSETS.index('cash')]
+    benchmark_sharpe = np.where(
+        benchmark_vol > 0,
+        (benchmark_return - risk_free) / np.where(benchmark_vol > 0, benchmark_vol, 1.0),
+        0.0,
+    )
+    
+    results = []
+    for s in range(len(block)):
+        results.append({
+            'returns': dict(zip(ASSETS, fwd[s].tolist())),
+            'volatilities': {
+                asset: float(volatility[s, i])
+                for i, asset in enumerate(ASSETS) if asset != 'cash'
+            },
+            'monthly_returns': {
+                asset: col[~np.isnan(col)].tolist()
+                for asset, col in zip(ASSETS, monthly[s].T)
+            },
+            'benchmark_return': float(benchmark_return[s]),
+            'benchmark_sharpe': float(benchmark_sharpe[s]),
+        })
+    return results
+
+
+def calculate_forward_metrics_batch(
+    windows: List[pd.DataFrame],
+    lookback_months: int = 24
+) -> List[Optional[dict]]:
+    """
+    calculate_forward_metrics for many windows at once.
+    
+    Windows of the same length (normally all of them) are stacked into one
+    block and reduced together. Entries are None where a window is too short.
+    """
+    by_length = {}
+    for i, window in enumerate(windows):
+        by_length.setdefault(len(window), []).append(i)
+    
+    results = [None] * len(windows)
+    for length, positions in by_length.items():
+        if length - lookback_months < 11:  # Need at least 11 months for returns
+            continue
+        block = np.stack([
+            windows[i][REAL_INDEX_COLUMNS].to_numpy(dtype=np.float64) for i in positions
+        ])
+        for i, metrics in zip(positions, _forward_metrics(block, lookback_months)):
+            results[i] = metrics
+    return results
 
 
 def calculate_forward_metrics(
@@ -142,99 +275,42 @@ def calculate_forward_metrics(
     - Volatilities for each asset
     - Benchmark 60/40 metrics
     """
-    # Split into lookback and forward
-    forward_start = lookback_months
-    lookback_data = window.iloc[:forward_start]
-    forward_data = window.iloc[forward_start:]
-    
-    if len(forward_data) < 11:  # Need at least 11 months for returns
-        return None
-    
-    # Get values at split point and end
-    split_idx = lookback_data.index[-1]
-    end_idx = forward_data.index[-1]
-    
-    # Calculate 12-month forward returns (real)
-    def calc_return(col):
-        start_val = window.loc[split_idx, col]
-        end_val = window.loc[end_idx, col]
-        if start_val == 0 or pd.isna(start_val):
-            return 0.0
-        return (end_val / start_val) - 1
-    
-    returns = {
-        'stocks': calc_return('idx_stocks_real'),
-        'bonds': calc_return('idx_bonds_real'),
-        'cash': calc_return('idx_cash_real'),
-        'gold': calc_return('idx_gold_real'),
-    }
-    
-    # Calculate monthly returns for volatility
-    def calc_monthly_returns(col):
-        return window[col].pct_change().iloc[forward_start:].dropna().tolist()
-    
-    monthly_returns = {
-        'stocks': calc_monthly_returns('idx_stocks_real'),
-        'bonds': calc_monthly_returns('idx_bonds_real'),
-        'cash': calc_monthly_returns('idx_cash_real'),
-        'gold': calc_monthly_returns('idx_gold_real'),
-    }
-    
-    # Calculate annualized volatility
-    def calc_volatility(monthly: list):
-        if len(monthly) < 2:
-            return 0.0
-        std = np.std(monthly)
-        return std * math.sqrt(12)  # Annualize
-    
-    volatilities = {
-        'stocks': calc_volatility(monthly_returns['stocks']),
-        'bonds': calc_volatility(monthly_returns['bonds']),
-        'gold': calc_volatility(monthly_returns['gold']),
-    }
-    
-    # Calculate benchmark (60/40) metrics
-    benchmark_alloc = {'stocks': 60, 'bonds': 40, 'cash': 0, 'gold': 0}
-    benchmark_return = sum(
-        benchmark_alloc[a] / 100 * returns[a] for a in returns
-    )
-    
-    # Benchmark monthly returns
-    benchmark_monthly = []
-    for i in range(len(monthly_returns['stocks'])):
-        m_ret = sum(
-            benchmark_alloc[a] / 100 * monthly_returns[a][i]
-            for a in returns if i < len(monthly_returns[a])
-        )
-        benchmark_monthly.append(m_ret)
-    
-    benchmark_vol = calc_volatility(benchmark_monthly)
-    risk_free = returns['cash']
+    return calculate_forward_metrics_batch([window], lookback_months)[0]
+
+
+def calculate_monthly_returns(indexed: np.ndarray, lookback_months: int = 24) -> dict:
+    """
+    Forward-period monthly returns per asset from the indexed matrix.
     
-    benchmark_sharpe = 0.0
-    if benchmark_vol > 0:
-        benchmark_sharpe = (benchmark_return - risk_free) / benchmark_vol
+    Month 24 (end of lookback) is the base for the first forward return,
+    matching the API's Sharpe calculation.
+    """
+    idx = indexed[lookback_months - 1:]
+    rets = np.diff(idx, axis=0) / idx[:-1]
     
     return {
-        'returns': returns,
-        'volatilities': volatilities,
-        'monthly_returns': monthly_returns,
-        'benchmark_return': benchmark_return,
-        'benchmark_sharpe': benchmark_sharpe,
+        'stocks': rets[:, 0].tolist(),
+        'bonds': rets[:, 1].tolist(),
+        'cash': rets[:, 2].tolist(),
+        'gold': rets[:, 3].tolist(),
     }
 
 
-def create_scenario(
-    db: Session,
+def scenario_row(
     window: pd.DataFrame,
     start_date: pd.Timestamp,
     metrics: dict,
     label: str,
     context: str = None
-) -> Scenario:
-    """Create a scenario in the database."""
+) -> dict:
+    """
+    Column values of a scenario, for a Core insert into scenarios.
+    
+    Its monthly data is on row['monthly_data_json']; the caller inserts
+    the matching scenario_data rows once the scenario has an id.
+    """
     # Convert numpy types to Python native types
-    scenario = Scenario(
+    row = dict(
         actual_start_date=start_date.date(),
         display_label=label,
         historical_context=context,
@@ -249,37 +325,38 @@ def create_scenario(
         benchmark_6040_sharpe=float(metrics['benchmark_sharpe']),
     )
     
-    db.add(scenario)
-    db.flush()  # Get the ID
+    # Every column the scenario needs, converted from the frame once
+    values = window[SCENARIO_COLUMNS].to_numpy(dtype=np.float64)
+    cols = dict(zip(SCENARIO_COLUMNS, values.T))
     
     # Re-index all series to 100 at month 1
-    stocks_indexed = index_to_100(window['idx_stocks_real'])
-    bonds_indexed = index_to_100(window['idx_bonds_real'])
-    cash_indexed = index_to_100(window['idx_cash_real'])
-    gold_indexed = index_to_100(window['idx_gold_real'])
-    
-    # Create monthly data points
-    for i, (idx, row) in enumerate(window.iterrows()):
-        month_index = i + 1
-        is_forward = month_index > 24
-        
-        data_point = ScenarioData(
-            scenario_id=scenario.id,
-            month_index=month_index,
-            is_forward=is_forward,
-            idx_stocks=float(stocks_indexed.iloc[i]),
-            idx_bonds=float(bonds_indexed.iloc[i]),
-            idx_cash=float(cash_indexed.iloc[i]),
-            idx_gold=float(gold_indexed.iloc[i]),
-            gdp_growth_yoy=float(row['gdp_growth_yoy']) if pd.notna(row['gdp_growth_yoy']) else None,
-            unemployment_rate=float(row['unemployment_rate']) if pd.notna(row['unemployment_rate']) else None,
-            inflation_rate_yoy=float(row['inflation_rate_yoy']) if pd.notna(row['inflation_rate_yoy']) else None,
-            fed_funds_rate=float(row['fed_funds_rate']) if pd.notna(row['fed_funds_rate']) else None,
-            industrial_prod_yoy=float(row['industrial_prod_yoy']) if pd.notna(row['industrial_prod_yoy']) else None,
-        )
-        db.add(data_point)
-    
-    return scenario
+    indexed = index_to_100(values[:, :len(REAL_INDEX_COLUMNS)])
+    
+    # Stored so the API doesn't recompute them on every reveal
+    row['monthly_returns'] = calculate_monthly_returns(indexed)
+    
+    # Macro columns as lists of floats, with gaps (NaN) as None
+    macro = {
+        col: np.where(np.isnan(cols[col]), None, cols[col]).tolist()
+        for col in MACRO_COLUMNS
+    }
+    
+    # Monthly data points, in the same shape the API returns them
+    months = [
+        {
+            'month_index': i + 1,
+            'is_forward': i + 1 > 24,
+            'idx_stocks': stocks,
+            'idx_bonds': bonds,
+            'idx_cash': cash,
+            'idx_gold': gold,
+            **{col: macro[col][i] for col in MACRO_COLUMNS},
+        }
+        for i, (stocks, bonds, cash, gold) in enumerate(indexed.tolist())
+    ]
+    row['monthly_data_json'] = months
+    
+    return row
 
 
 def generate_scenarios(
@@ -295,61 +372,86 @@ def generate_scenarios(
     """
     if start_dates is None:
         start_dates = DEFAULT_START_DATES
+    if not start_dates:
+        print("No start dates given; nothing to generate")
+        return
     
     # Load data
     print("Loading normalized data...")
-    df = load_normalized_data()
+    # Only the months some scenario window can reach
+    starts = [pd.Timestamp(date_str) for date_str in start_dates]
+    df = load_normalized_data(
+        SCENARIO_COLUMNS,
+        start=min(starts) - pd.DateOffset(months=24),
+        end=max(starts) + pd.DateOffset(months=11),
+    )
     print(f"  Loaded {len(df)} months of data")
     
     # Create tables
     Base.metadata.create_all(bind=engine)
     
-    db = SessionLocal()
+    print(f"Generating {len(start_dates)} scenarios...")
     
-    try:
-        if clear_existing:
-            print("Clearing existing scenarios...")
-            db.query(ScenarioData).delete()
-            db.query(Scenario).delete()
-            db.commit()
+    # Extract every window first so their metrics can be computed together
+    candidates = []
+    for i, date_str in enumerate(start_dates):
+        label = f"Scenario {chr(65 + i)}"  # A, B, C, ...
+        start_date = pd.Timestamp(date_str)
+        context = HISTORICAL_CONTEXT.get(date_str, None)
         
-        print(f"Generating {len(start_dates)} scenarios...")
+        window = extract_scenario_window(df, start_date)
+        if window is None:
+            print(f"  [{i+1}/{len(start_dates)}] {date_str}: skipping - insufficient data")
+            continue
+        candidates.append((i, date_str, start_date, label, context, window))
+    
+    all_metrics = calculate_forward_metrics_batch([c[-1] for c in candidates])
+    
+    scenario_rows = []
+    
+    for (i, date_str, start_date, label, context, window), metrics in zip(candidates, all_metrics):
+        print(f"  [{i+1}/{len(start_dates)}] {date_str}: {context or label}")
         
-        for i, date_str in enumerate(start_dates):
-            label = f"Scenario {chr(65 + i)}"  # A, B, C, ...
-            start_date = pd.Timestamp(date_str)
-            context = HISTORICAL_CONTEXT.get(date_str, None)
-            
-            print(f"  [{i+1}/{len(start_dates)}] {date_str}: {context or label}")
-            
-            # Extract window
-            window = extract_scenario_window(df, start_date)
-            if window is None:
-                print(f"    Skipping - insufficient data")
-                continue
-            
-            # Calculate metrics
-            metrics = calculate_forward_metrics(window)
-            if metrics is None:
-                print(f"    Skipping - could not calculate metrics")
-                continue
-            
-            # Create scenario
-            scenario = create_scenario(db, window, start_date, metrics, label, context)
-            print(f"    Created scenario ID {scenario.id}")
-            print(f"    Forward returns: Stocks={metrics['returns']['stocks']:.1%}, "
-                  f"Bonds={metrics['returns']['bonds']:.1%}, "
-                  f"Gold={metrics['returns']['gold']:.1%}")
+        if metrics is None:
+            print(f"    Skipping - could not calculate metrics")
+            continue
         
-        db.commit()
-        print("\nScenarios generated successfully!")
+        scenario_rows.append(scenario_row(window, start_date, metrics, label, context))
+        print(f"    Forward returns: Stocks={metrics['returns']['stocks']:.1%}, "
+              f"Bonds={metrics['returns']['bonds']:.1%}, "
+              f"Gold={metrics['returns']['gold']:.1%}")
+    
+    # One transaction of Core statements: no unit of work or identity map,
+    # and each table's rows go in as a single executemany
+    scenarios_table = Scenario.__table__
+    with engine.begin() as conn:
+        # The pipeline can simply be rerun, so don't wait on the WAL flush at
+        # commit; SET LOCAL scopes this to the transaction (safe with pgbouncer)
+        conn.execute(text("SET LOCAL synchronous_commit = off"))
         
-        # Print summary
-        count = db.query(Scenario).count()
-        print(f"Total scenarios in database: {count}")
+        if clear_existing:
+            print("Clearing existing scenarios...")
+            conn.execute(delete(ScenarioData.__table__))
+            conn.execute(delete(scenarios_table))
         
-    finally:
-        db.close()
+        if scenario_rows:
+            ids = conn.execute(
+                insert(scenarios_table).returning(scenarios_table.c.id, sort_by_parameter_order=True),
+                scenario_rows,
+            ).scalars().all()
+            conn.execute(insert(ScenarioData.__table__), [
+                {'scenario_id': scenario_id, **month}
+                for scenario_id, row in zip(ids, scenario_rows)
+                for month in row['monthly_data_json']
+            ])
+            print(f"  Created scenario IDs {', '.join(map(str, ids))}")
+        
+        count = conn.execute(select(func.count()).select_from(scenarios_table)).scalar_one()
+    
+    print("\nScenarios generated successfully!")
+    
+    # Print summary
+    print(f"Total scenarios in database: {count}")
 
 
 def main():
@@ -9,6 +9,8 @@ Output: raw_data.parquet
 """
 import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
@@ -51,6 +53,10 @@ SHILLER_URL = settings.shiller_url
 
 DATA_DIR = Path(__file__).parent.parent / "data"
 
+# Parsed Shiller data, reused for a while instead of re-downloading the sheet
+SHILLER_CACHE_PATH = DATA_DIR / "_cache" / "shiller.parquet"
+SHILLER_CACHE_MAX_AGE_DAYS = 7
+
 
 def fetch_fred_series_with_api(fred: Fred, series_id: str) -> pd.Series:
     """Fetch a single series using fredapi library."""
@@ -68,23 +74,32 @@ def fetch_all_fred_data() -> pd.DataFrame:
     
     fred = Fred(api_key=FRED_API_KEY)
     
+    # Each fetch is a blocking HTTPS round trip, so request every series
+    # (including all gold candidates) at once on a thread pool
+    series_ids = list(FRED_SERIES) + GOLD_SERIES
+    for series_id in FRED_SERIES:
+        print(f"  Fetching {series_id} -> {FRED_SERIES[series_id]}")
+    print(f"  Fetching gold price candidates: {', '.join(GOLD_SERIES)}")
+    with ThreadPoolExecutor(max_workers=len(series_ids)) as executor:
+        fetched = dict(zip(
+            series_ids,
+            executor.map(lambda series_id: fetch_fred_series_with_api(fred, series_id), series_ids),
+        ))
+    
     all_series = {}
     
-    # Fetch main series
+    # Main series
     for series_id, name in FRED_SERIES.items():
-        print(f"  Fetching {series_id} -> {name}")
-        data = fetch_fred_series_with_api(fred, series_id)
+        data = fetched[series_id]
         if not data.empty:
             all_series[name] = data
     
-    # Fetch gold (try multiple series)
-    print("  Fetching gold price...")
+    # Gold (first usable candidate, in order of preference)
     for gold_series in GOLD_SERIES:
-        print(f"    Trying {gold_series}...")
-        data = fetch_fred_series_with_api(fred, gold_series)
+        data = fetched[gold_series]
         if not data.empty and len(data) > 100:
             all_series["gold"] = data
-            print(f"    Success: {len(data)} observations")
+            print(f"    Gold from {gold_series}: {len(data)} observations")
             break
     
     if "gold" not in all_series:
@@ -124,6 +139,12 @@ def fetch_shiller_data() -> pd.DataFrame:
     """
     print("Fetching Shiller data...")
     
+    if SHILLER_CACHE_PATH.exists():
+        age_days = (time.time() - SHILLER_CACHE_PATH.stat().st_mtime) / 86400
+        if age_days < SHILLER_CACHE_MAX_AGE_DAYS:
+            print(f"  Using cached Shiller data ({age_days:.1f} days old)")
+            return pd.read_parquet(SHILLER_CACHE_PATH, engine="pyarrow")
+    
     try:
         # Try to fetch from URL
         response = requests.get(SHILLER_URL, timeout=30)
@@ -150,21 +171,15 @@ def fetch_shiller_data() -> pd.DataFrame:
     
     # Convert date format YYYY.MM to datetime
     # Shiller format: 2006.01 = January 2006, 2006.10 = October 2006
-    def parse_shiller_date(val):
-        try:
-            val_float = float(val)
-            year = int(val_float)
-            # The decimal part IS the month (01-12), not a fraction
-            month_decimal = round((val_float - year) * 100)
-            month = int(month_decimal)
-            month = min(max(month, 1), 12)
-            return pd.Timestamp(year=year, month=month, day=1)
-        except:
-            return pd.NaT
-    
-    df["date"] = df["date"].apply(parse_shiller_date)
-    df = df.dropna(subset=["date"])
-    df = df.set_index("date")
+    vals = pd.to_numeric(df["date"], errors="coerce")
+    df = df[vals.notna()]
+    vals = vals[vals.notna()].to_numpy(dtype=np.float64)
+    year = vals.astype(np.int64)
+    # The decimal part IS the month (01-12), not a fraction
+    month = np.clip(np.rint((vals - year) * 100).astype(np.int64), 1, 12)
+    df = df.assign(
+        date=pd.to_datetime(pd.DataFrame({"year": year, "month": month, "day": 1}, index=df.index))
+    ).set_index("date")
     
     # Calculate total return (price + dividends)
     df["sp500"] = pd.to_numeric(df["sp500"], errors="coerce")
@@ -178,7 +193,12 @@ def fetch_shiller_data() -> pd.DataFrame:
     df["sp500_total_return_idx"] = (1 + df["sp500_return"]).cumprod() * 100
     
     print(f"  Shiller data: {len(df)} rows")
-    return df[["sp500", "sp500_total_return_idx"]]
+    result = df[["sp500", "sp500_total_return_idx"]]
+    
+    # Only real downloads are cached, never the synthetic fallback
+    SHILLER_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    result.to_parquet(SHILLER_CACHE_PATH, engine="pyarrow")
+    return result
 
 
 def _create_synthetic_stock_data() -> pd.DataFrame:
@@ -212,21 +232,16 @@ def merge_all_data(fred_data: pd.DataFrame, shiller_data: pd.DataFrame) -> pd.Da
     # Align Shiller to month start
     shiller_data.index = shiller_data.index.to_period("M").to_timestamp()
     
-    # Merge
-    merged = pd.merge(
-        fred_monthly,
-        shiller_data,
-        left_index=True,
-        right_index=True,
-        how="outer"
-    )
+    # Merge; both are keyed on a sorted month-start index
+    merged = fred_monthly.join(shiller_data, how="outer")
     
     # Filter to valid date range (1968+ for gold data)
-    merged = merged[merged.index >= "1968-01-01"]
-    merged = merged[merged.index <= "2023-12-31"]
+    merged = merged.loc["1968-01-01":"2023-12-31"]
     
-    # Forward fill and back fill missing values
-    merged = merged.ffill().bfill()
+    # Forward fill and back fill missing values, in the columns that have any
+    # (assign, since merged is a slice of the joined frame)
+    gaps = merged.columns[merged.isna().any()]
+    merged = merged.assign(**{col: merged[col].ffill().bfill() for col in gaps})
     
     print(f"  Merged data: {len(merged)} rows")
     return merged
@@ -240,7 +255,8 @@ def save_data(df: pd.DataFrame, output_path: str = None):
     output_path = Path(output_path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
-    df.to_parquet(output_path, engine="pyarrow")
+    # ~10 years of months per row group, as for normalized_data
+    df.to_parquet(output_path, engine="pyarrow", compression="zstd", row_group_size=120)
     print(f"Saved to {output_path}")
 
 
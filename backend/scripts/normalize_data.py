@@ -16,19 +16,75 @@ from pathlib import Path
 import pandas as pd
 import numpy as np
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the kernels then run as plain Python
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
 # Add parent to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 DATA_DIR = Path(__file__).parent.parent / "data"
 
+BOND_DURATION = 7.0  # ~7 year duration for the 10-year Treasury
+
+# Raw columns the normalization reads (raw_data also keeps e.g. the S&P price)
+RAW_COLUMNS = [
+    "sp500_total_return_idx", "bond_yield_10y", "tbill_3m", "gold", "cpi",
+    "gdp_growth", "unemployment", "fed_funds", "industrial_prod",
+]
+
+
+# The kernels below fuse the diff / cumprod / fillna chains into one pass.
+# They match pandas exactly: a month with no return (NaN) is 100 in the
+# output and is skipped by the running product. No fastmath, since that
+# lets LLVM assume NaN never occurs and drop the checks.
+@njit(cache=True)
+def _bond_ret_idx(yields, duration):
+    """Total return index from decimal yields; month 0 has no return so is 100."""
+    n = yields.shape[0]
+    idx = np.empty(n)
+    if n == 0:
+        return idx
+    idx[0] = 100.0
+    growth = 1.0
+    for i in range(1, n):
+        # Coupon income minus price change
+        monthly_return = yields[i] / 12.0 - duration * (yields[i] - yields[i - 1])
+        if np.isnan(monthly_return):
+            idx[i] = 100.0
+        else:
+            growth *= 1.0 + monthly_return
+            idx[i] = growth * 100.0
+    return idx
+
+
+@njit(cache=True)
+def _cash_idx(rates):
+    """Total return index from decimal annualized rates."""
+    n = rates.shape[0]
+    idx = np.empty(n)
+    growth = 1.0
+    for i in range(n):
+        monthly_rate = rates[i] / 12.0
+        if np.isnan(monthly_rate):
+            idx[i] = 100.0
+        else:
+            growth *= 1.0 + monthly_rate
+            idx[i] = growth * 100.0
+    return idx
+
 
 def load_raw_data() -> pd.DataFrame:
-    """Load raw data from parquet file."""
+    """Load the raw columns normalization needs from parquet file."""
     path = DATA_DIR / "raw_data.parquet"
     if not path.exists():
         raise FileNotFoundError(f"Raw data not found at {path}. Run fetch_data.py first.")
     
-    return pd.read_parquet(path)
+    return pd.read_parquet(path, columns=RAW_COLUMNS, engine="pyarrow")
 
 
 def calculate_bond_returns(df: pd.DataFrame) -> pd.Series:
@@ -40,20 +96,8 @@ def calculate_bond_returns(df: pd.DataFrame) -> pd.Series:
     
     Assumes ~7 year duration for 10-year Treasury
     """
-    duration = 7.0
-    yields = df["bond_yield_10y"] / 100  # Convert to decimal
-    
-    # Monthly yield change
-    yield_change = yields.diff()
-    
-    # Approximate monthly return: coupon income - price change
-    monthly_return = yields / 12 - duration * yield_change
-    
-    # Build total return index
-    return_idx = (1 + monthly_return).cumprod() * 100
-    return_idx = return_idx.fillna(100)
-    
-    return return_idx
+    yields = df["bond_yield_10y"].to_numpy(dtype=np.float64) / 100  # Convert to decimal
+    return pd.Series(_bond_ret_idx(yields, BOND_DURATION), index=df.index)
 
 
 def calculate_cash_returns(df: pd.DataFrame) -> pd.Series:
@@ -62,11 +106,8 @@ def calculate_cash_returns(df: pd.DataFrame) -> pd.Series:
     
     T-bill rate is already an annualized yield, so monthly return = rate/12
     """
-    monthly_rate = df["tbill_3m"] / 100 / 12
-    return_idx = (1 + monthly_rate).cumprod() * 100
-    return_idx = return_idx.fillna(100)
-    
-    return return_idx
+    rates = df["tbill_3m"].to_numpy(dtype=np.float64) / 100
+    return pd.Series(_cash_idx(rates), index=df.index)
 
 
 def calculate_gold_returns(df: pd.DataFrame) -> pd.Series:
@@ -90,9 +131,20 @@ def calculate_real_returns(
     return real_returns
 
 
+def _yoy(values: np.ndarray) -> np.ndarray:
+    """Percent change over 12 months; the first 12 months are NaN."""
+    out = np.full_like(values, np.nan)
+    out[12:] = (values[12:] / values[:-12] - 1.0) * 100.0
+    return out
+
+
 def calculate_yoy_changes(series: pd.Series) -> pd.Series:
-    """Calculate year-over-year percentage change."""
-    return series.pct_change(12) * 100
+    """
+    Calculate year-over-year percentage change.
+    
+    Same as pct_change(12) * 100 for the gap-free (already filled) raw data.
+    """
+    return pd.Series(_yoy(series.to_numpy(dtype=np.float64)), index=series.index)
 
 
 def normalize_data(df: pd.DataFrame) -> pd.DataFrame:
@@ -167,7 +219,11 @@ def normalize_data(df: pd.DataFrame) -> pd.DataFrame:
 def save_normalized_data(df: pd.DataFrame):
     """Save normalized data to parquet."""
     output_path = DATA_DIR / "normalized_data.parquet"
-    df.to_parquet(output_path, engine="pyarrow")
+    # Named so readers can filter rows on it (see compute_scenarios)
+    # ~10 years per row group, so date-filtered reads can skip most of them
+    df.rename_axis("date").to_parquet(
+        output_path, engine="pyarrow", compression="zstd", row_group_size=120
+    )
     print(f"Saved to {output_path}")
 
 